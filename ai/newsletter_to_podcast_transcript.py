@@ -2,29 +2,298 @@
 # -*- coding: utf-8 -*-
 
 import os
-import openai
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator
 
+from pipeline.provider_limits import provider_slot
+from pipeline.http_clients import get_openai_client
+from pipeline.metrics import record, propagate
 
-def transform_newsletter_to_podcast(newsletter_content: str) -> str:
+if TYPE_CHECKING:
+    # The SDK itself is imported by get_openai_client on the first API call
+    from openai import OpenAI
+
+
+# Model settings; PROMPT_VERSION must be bumped whenever the prompt text changes
+# so cached scripts generated with the old prompt are not reused
+MODEL = "gpt-4o"
+MAX_TOKENS = 2000
+TEMPERATURE = 0.7
+PROMPT_VERSION = "1"
+
+# Long newsletters are summarized section by section (map) before the final
+# script pass (reduce). PODCAST_TOKEN_BUDGET caps the estimated prompt plus
+# completion tokens spent on one episode across all calls.
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv('PODCAST_MAP_REDUCE_TOKENS', '6000'))
+SECTION_TOKENS = 2500
+SUMMARY_MAX_TOKENS = 400
+MAP_WORKERS = 4
+TOKEN_BUDGET = int(os.getenv('PODCAST_TOKEN_BUDGET', '40000'))
+
+# Tokens added per request by the prompt template and chat formatting
+PROMPT_OVERHEAD_TOKENS = 450
+CHARS_PER_TOKEN = 4
+
+# Translation of finished scripts for language variants; bump TRANSLATION_PROMPT_VERSION
+# whenever the translation prompt changes
+TRANSLATION_PROMPT_VERSION = "1"
+TRANSLATION_MAX_TOKENS = 4000
+
+SYSTEM_PROMPT = "You are an experienced radio host and podcast producer who specializes in transforming written content into engaging, conversational audio scripts."
+
+
+def get_script_cache_params() -> dict:
     """
-    Transform the cleaned newsletter text into a podcast script using GPT-4o
+    Settings that influence the generated script, used to key cached scripts
+    
+    Returns:
+        Dictionary of model and prompt settings
+    """
+    return {
+        "model": MODEL,
+        "prompt_version": PROMPT_VERSION,
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "map_reduce_tokens": MAP_REDUCE_THRESHOLD_TOKENS,
+        "section_tokens": SECTION_TOKENS,
+        "summary_max_tokens": SUMMARY_MAX_TOKENS,
+        "token_budget": TOKEN_BUDGET,
+    }
+
+
+def get_translation_cache_params(language: str) -> dict:
+    """
+    Settings that influence a translated script, used to key cached translations
+    
+    Args:
+        language: Target language (e.g., 'Spanish')
+    
+    Returns:
+        Dictionary of model, prompt and language settings
+    """
+    return {
+        "model": MODEL,
+        "prompt_version": TRANSLATION_PROMPT_VERSION,
+        "max_tokens": TRANSLATION_MAX_TOKENS,
+        "language": language,
+    }
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding of MODEL, or None when tiktoken is not installed"""
+    try:
+        import tiktoken
+    except ImportError:  # Optional; token counts fall back to a character estimate
+        return None
+    
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the model tokens in a text
+    
+    Uses tiktoken when installed, otherwise estimates one token per four characters.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Number of tokens
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_long_paragraph(paragraph: str, max_tokens: int) -> list[str]:
+    """Split a paragraph that alone exceeds max_tokens on word boundaries"""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in paragraph.split():
+        word_tokens = count_tokens(word + " ")
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_sections(newsletter_content: str, max_tokens: int = SECTION_TOKENS) -> list[str]:
+    """
+    Split newsletter text into sections of at most max_tokens, on paragraph boundaries
+    
+    Args:
+        newsletter_content: Cleaned newsletter text (paragraphs separated by blank lines)
+        max_tokens: Maximum tokens per section
+    
+    Returns:
+        List of sections in document order
+    """
+    sections = []
+    current = []
+    current_tokens = 0
+    
+    for paragraph in newsletter_content.split('\n\n'):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        paragraph_tokens = count_tokens(paragraph)
+        parts = [paragraph] if paragraph_tokens <= max_tokens else _split_long_paragraph(paragraph, max_tokens)
+        for part in parts:
+            part_tokens = count_tokens(part) if len(parts) > 1 else paragraph_tokens
+            if current and current_tokens + part_tokens > max_tokens:
+                sections.append('\n\n'.join(current))
+                current = []
+                current_tokens = 0
+            current.append(part)
+            current_tokens += part_tokens
+    
+    if current:
+        sections.append('\n\n'.join(current))
+    return sections
+
+
+def _fit_sections_to_budget(sections: list[str]) -> list[str]:
+    """
+    Keep the leading sections whose map calls plus the final pass fit TOKEN_BUDGET
+    
+    Args:
+        sections: Sections in document order
+    
+    Returns:
+        The sections to summarize (at least one)
+    """
+    # The final pass reads every summary and writes the full script
+    spent = PROMPT_OVERHEAD_TOKENS + MAX_TOKENS
+    kept = []
+    for section in sections:
+        cost = count_tokens(section) + PROMPT_OVERHEAD_TOKENS + 2 * SUMMARY_MAX_TOKENS
+        if kept and spent + cost > TOKEN_BUDGET:
+            break
+        kept.append(section)
+        spent += cost
+    
+    if len(kept) < len(sections):
+        print(f"⚠️ Token budget of {TOKEN_BUDGET} reached: summarizing {len(kept)} of {len(sections)} sections")
+    return kept
+
+
+def _truncate_to_budget(newsletter_content: str) -> str:
+    """Trim single-pass input so prompt plus completion stay within TOKEN_BUDGET"""
+    available = TOKEN_BUDGET - PROMPT_OVERHEAD_TOKENS - MAX_TOKENS
+    if count_tokens(newsletter_content) <= available:
+        return newsletter_content
+    
+    print(f"⚠️ Token budget of {TOKEN_BUDGET} reached: truncating newsletter content")
+    kept = split_sections(newsletter_content, max(available, 1))[0]
+    return kept
+
+
+def build_section_summary_messages(section: str, index: int, total: int) -> list[dict]:
+    """
+    Build the chat messages asking for notes on one newsletter section
+    
+    Args:
+        section: Section of the cleaned newsletter text
+        index: Zero-based position of the section
+        total: Number of sections in the newsletter
+    
+    Returns:
+        List of chat completion messages
+    """
+    prompt = f"""
+The following is part {index + 1} of {total} of a newsletter that will be turned into a short podcast episode.
+
+Write concise notes covering everything a radio host would need from this part:
+- The main news stories, announcements and special events, with names, dates, places and numbers
+- Any weather information
+- Skip ads, sign-up prompts and boilerplate
+
+Write plain sentences or short bullet points, no introduction.
+
+NEWSLETTER PART:
+{section}
+"""
+    
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _record_usage(usage) -> None:
+    """Add the token usage reported with a completion to the current stage metrics"""
+    record(llm_requests=1)
+    if usage is not None:
+        record(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+
+def _summarize_section(client: "OpenAI", section: str, index: int, total: int) -> str:
+    with provider_slot("openai"):
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=build_section_summary_messages(section, index, total),
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=0.3
+        )
+    _record_usage(response.usage)
+    return response.choices[0].message.content.strip()
+
+
+def prepare_script_input(newsletter_content: str, client: "OpenAI" = None) -> str:
+    """
+    Reduce long newsletters to section notes so the script prompt stays bounded
+    
+    Short newsletters are returned unchanged (trimmed to the token budget if
+    necessary). Newsletters above MAP_REDUCE_THRESHOLD_TOKENS are split into
+    sections that are summarized concurrently; the notes are joined in order.
     
     Args:
         newsletter_content: Cleaned newsletter text content
+        client: OpenAI client to use, defaults to the shared client
     
     Returns:
-        Generated podcast script text
+        Text to place in the final script prompt
     """
+    input_tokens = count_tokens(newsletter_content)
+    if input_tokens <= MAP_REDUCE_THRESHOLD_TOKENS:
+        return _truncate_to_budget(newsletter_content)
     
-    # Get OpenAI API key from environment
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    sections = _fit_sections_to_budget(split_sections(newsletter_content))
+    print(f"🧩 Newsletter is {input_tokens} tokens: summarizing {len(sections)} sections")
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+    client = client or get_openai_client()
+    with ThreadPoolExecutor(max_workers=min(MAP_WORKERS, len(sections))) as executor:
+        futures = [executor.submit(propagate(_summarize_section), client, section, i, len(sections))
+                   for i, section in enumerate(sections)]
+        summaries = [future.result() for future in futures]
     
+    return '\n\n'.join(summaries)
+
+
+def build_podcast_messages(newsletter_content: str) -> list[dict]:
+    """
+    Build the chat messages asking for a podcast script
+    
+    Args:
+        newsletter_content: Cleaned newsletter text content, or section notes
+            from prepare_script_input
+    
+    Returns:
+        List of chat completion messages
+    """
     # Create the prompt for podcast transformation
     prompt = f"""
 Transform the following newsletter content into a conversational podcast transcript. Write it as if you're a radio host speaking directly to listeners.
@@ -55,17 +324,38 @@ NEWSLETTER CONTENT:
 Generate a clean podcast transcript with ONLY the spoken words - no formatting or stage directions:
 """
     
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def transform_newsletter_to_podcast(newsletter_content: str, client: "OpenAI" = None) -> str:
+    """
+    Transform the cleaned newsletter text into a podcast script using GPT-4o
+    
+    Args:
+        newsletter_content: Cleaned newsletter text content
+        client: OpenAI client to use, defaults to the shared client
+    
+    Returns:
+        Generated podcast script text
+    """
+    
+    client = client or get_openai_client()
+    
     try:
+        script_input = prepare_script_input(newsletter_content, client)
+        
         # Make API call to GPT-4o
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an experienced radio host and podcast producer who specializes in transforming written content into engaging, conversational audio scripts."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.7
-        )
+        with provider_slot("openai"):
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=build_podcast_messages(script_input),
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE
+            )
+        _record_usage(response.usage)
         
         # Extract the generated script
         podcast_script = response.choices[0].message.content
@@ -76,6 +366,104 @@ Generate a clean podcast transcript with ONLY the spoken words - no formatting o
         raise Exception(f"Error calling OpenAI API: {str(e)}")
 
 
+def stream_podcast_script(newsletter_content: str, client: "OpenAI" = None) -> Iterator[str]:
+    """
+    Generate the podcast script as a stream of text fragments
+    
+    Args:
+        newsletter_content: Cleaned newsletter text content
+        client: OpenAI client to use, defaults to the shared client
+    
+    Returns:
+        Iterator over text fragments in generation order; joined they form the full script
+    """
+    
+    client = client or get_openai_client()
+    
+    try:
+        script_input = prepare_script_input(newsletter_content, client)
+        
+        with provider_slot("openai"):
+            stream = client.chat.completions.create(
+                model=MODEL,
+                messages=build_podcast_messages(script_input),
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE,
+                stream=True,
+                # The last chunk then carries the token usage (and no choices)
+                stream_options={"include_usage": True}
+            )
+            
+            usage = None
+            for chunk in stream:
+                usage = chunk.usage or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            _record_usage(usage)
+        
+    except Exception as e:
+        raise Exception(f"Error calling OpenAI API: {str(e)}")
+
+
+def build_translation_messages(podcast_script: str, language: str) -> list[dict]:
+    """
+    Build the chat messages asking for a translated podcast script
+    
+    Args:
+        podcast_script: Finished podcast script
+        language: Target language
+    
+    Returns:
+        List of chat completion messages
+    """
+    prompt = f"""
+Translate the following podcast transcript into {language}.
+
+- Keep the warm, conversational radio tone and address the listeners directly
+- Adapt idioms, greetings and phrasing so they sound natural to native {language} speakers
+- Keep names of people, places, venues and events as they are
+- Output ONLY the translated spoken text, with the same paragraph breaks and no notes or labels
+
+PODCAST TRANSCRIPT:
+{podcast_script}
+"""
+    
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def translate_script(podcast_script: str, language: str, client: "OpenAI" = None) -> str:
+    """
+    Translate a finished podcast script for a language variant
+    
+    Args:
+        podcast_script: Finished podcast script
+        language: Target language (e.g., 'Spanish')
+        client: OpenAI client to use, defaults to the shared client
+    
+    Returns:
+        Translated podcast script
+    """
+    
+    client = client or get_openai_client()
+    
+    try:
+        with provider_slot("openai"):
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=build_translation_messages(podcast_script, language),
+                max_tokens=TRANSLATION_MAX_TOKENS,
+                temperature=0.3
+            )
+        _record_usage(response.usage)
+        return response.choices[0].message.content.strip()
+        
+    except Exception as e:
+        raise Exception(f"Error calling OpenAI API: {str(e)}")
+
+
 if __name__ == "__main__":
     try:
         # Example usage with file input for testing
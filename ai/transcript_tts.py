@@ -1,15 +1,296 @@
 #!/usr/bin/env python3
 
 import os
-import replicate
+import re
+import io
+import time
+import wave
+import shutil
+import tempfile
+import requests
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
 
-def text_to_speech(script_content: str, output_filename: str = "podcast_audio.wav"):
+from pipeline.provider_limits import provider_slot
+from pipeline.http_clients import get_session, CONNECT_TIMEOUT
+from pipeline.metrics import record, propagate
+
+
+TTS_MODEL = "minimax/speech-02-turbo"
+
+# TTS parameters sent with every request (the text is added per call)
+TTS_PARAMS = {
+    "pitch": 0,
+    "speed": 1,
+    "volume": 1,
+    "bitrate": 128000,
+    "channel": "mono",
+    "voice_id": "Deep_Voice_Man",
+    "sample_rate": 32000,
+    "language_boost": "English",
+    "english_normalization": True
+}
+
+# TTS_PARAMS that audio variants may override (see pipeline/variants.py)
+VOICE_SETTINGS = ("voice_id", "speed", "pitch", "volume", "language_boost")
+
+# Chunked mode settings
+MAX_CHUNK_CHARS = 1200
+CHUNK_WORKERS = 4
+CHUNK_RETRIES = 3
+
+# Chunk audio stays in memory up to this size before spilling to a temporary file
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+FRAMES_PER_BLOCK = 32000
+
+# Streaming mode only cuts at a paragraph break once this much text is buffered
+MIN_STREAM_SEGMENT_CHARS = 300
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def get_tts_cache_params(chunked: bool = False, voice: Optional[dict] = None) -> dict:
+    """
+    Settings that influence the generated audio, used to key cached audio
+    
+    Args:
+        chunked: Whether the audio is synthesized in chunks
+        voice: Optional VOICE_SETTINGS overriding TTS_PARAMS
+    
+    Returns:
+        Dictionary of model and voice settings
+    """
+    params = {"model": TTS_MODEL, **TTS_PARAMS, **(voice or {})}
+    if chunked:
+        params["chunked"] = True
+        params["max_chunk_chars"] = MAX_CHUNK_CHARS
+    return params
+
+
+def split_script(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]:
+    """
+    Split a script into chunks of at most max_chars characters
+    
+    Paragraphs are kept together where possible, then sentences; only a single
+    sentence longer than max_chars is cut at a word boundary.
+    
+    Args:
+        text: Script text
+        max_chars: Maximum chunk length
+    
+    Returns:
+        List of non-empty chunks in script order
+    """
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text.strip()):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(' ', 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            pieces.append(sentence)
+    
+    # Greedily merge neighbouring pieces up to the size limit
+    chunks = []
+    for piece in pieces:
+        if not piece:
+            continue
+        if chunks and len(chunks[-1]) + 2 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]}\n\n{piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def _find_segment_cut(buffer: str, max_chars: int, min_chars: int):
+    """Position where a complete segment ends in a streaming buffer, or None to wait for more text"""
+    # Prefer the last paragraph break within the size limit once enough text accumulated
+    paragraph_end = buffer.rfind('\n\n', 0, max_chars)
+    if paragraph_end >= min_chars:
+        return paragraph_end + 2
+    if len(buffer) <= max_chars:
+        return None
+    
+    # Too long without a usable paragraph break: cut after the last complete sentence
+    sentence_ends = [match.end() for match in SENTENCE_BOUNDARY.finditer(buffer, 0, max_chars)]
+    if sentence_ends:
+        return sentence_ends[-1]
+    cut = buffer.rfind(' ', 0, max_chars)
+    return cut if cut > 0 else max_chars
+
+
+def iter_speech_segments(text_deltas: Iterable[str], max_chars: int = MAX_CHUNK_CHARS,
+                         min_chars: int = MIN_STREAM_SEGMENT_CHARS) -> Iterator[str]:
+    """
+    Cut a stream of text fragments into speakable segments as soon as they are complete
+    
+    Args:
+        text_deltas: Text fragments in order (e.g., LLM stream deltas)
+        max_chars: Maximum segment length
+        min_chars: Minimum buffered length before cutting at a paragraph break
+    
+    Returns:
+        Iterator over segments of at most max_chars characters
+    """
+    buffer = ""
+    for delta in text_deltas:
+        buffer += delta
+        cut = _find_segment_cut(buffer, max_chars, min_chars)
+        while cut is not None:
+            segment, buffer = buffer[:cut].strip(), buffer[cut:]
+            if segment:
+                yield segment
+            cut = _find_segment_cut(buffer, max_chars, min_chars)
+    
+    if buffer.strip():
+        yield from split_script(buffer, max_chars)
+
+
+def new_audio_path(suffix: str = ".wav") -> Path:
+    """
+    Reserve a unique temporary file for an episode
+    
+    Args:
+        suffix: File extension
+    
+    Returns:
+        Path to an empty file in the system temporary directory
+    """
+    fd, path = tempfile.mkstemp(prefix="podcast_audio_", suffix=suffix)
+    os.close(fd)
+    return Path(path)
+
+
+def _write_output(output, destination: BinaryIO, session: requests.Session = None) -> None:
+    """Stream a Replicate output (file-like, URL or raw bytes) into a binary file"""
+    if isinstance(output, (bytes, bytearray)):
+        # If output is binary data, save directly
+        destination.write(output)
+    elif isinstance(output, str):
+        # If output is a URL, download it in chunks over the pooled session
+        session = session or get_session("replicate")
+        with session.get(output, stream=True, timeout=(CONNECT_TIMEOUT, 120)) as response:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=DOWNLOAD_BLOCK_SIZE):
+                destination.write(block)
+    elif isinstance(output, io.IOBase):
+        shutil.copyfileobj(output, destination, DOWNLOAD_BLOCK_SIZE)
+    elif hasattr(output, '__iter__'):
+        # Replicate FileOutput yields the response body in chunks
+        for block in output:
+            destination.write(block)
+    else:
+        # Any other file-like object, read it
+        destination.write(output.read())
+
+
+def _synthesize(text: str, destination: BinaryIO, extra_params: dict = None) -> None:
+    """
+    Run the TTS model on one piece of text and stream the audio into a file
+    
+    Args:
+        text: Text to speak
+        destination: Binary file receiving the audio
+        extra_params: Parameters added to TTS_PARAMS
+    """
+    # Imported on first use, so runs without a new post never load the SDK
+    import replicate
+    
+    input_params = {"text": text, **TTS_PARAMS, **(extra_params or {})}
+    record(tts_requests=1, tts_characters=len(text))
+    
+    with provider_slot("replicate"):
+        output = replicate.run(
+            TTS_MODEL,
+            input=input_params
+        )
+        _write_output(output, destination)
+
+
+def _synthesize_chunk(index: int, text: str, voice: Optional[dict] = None) -> BinaryIO:
+    """Synthesize one chunk as WAV into a spooled buffer, retrying only this chunk on failure"""
+    for attempt in range(1, CHUNK_RETRIES + 1):
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            _synthesize(text, buffer, {**(voice or {}), "audio_format": "wav"})
+            buffer.seek(0)
+            return buffer
+        except Exception as e:
+            buffer.close()
+            if attempt == CHUNK_RETRIES:
+                raise Exception(f"TTS failed for chunk {index + 1} after {attempt} attempts: {str(e)}")
+            print(f"⚠️  TTS chunk {index + 1} failed (attempt {attempt}), retrying: {str(e)}")
+            record(retries=1)
+            time.sleep(2 ** attempt)
+
+
+def concatenate_wav(chunks: list[Union[bytes, BinaryIO]], output_path: Path) -> Path:
+    """
+    Concatenate WAV files into one, without re-encoding
+    
+    Frames are copied in blocks, so memory use does not grow with the episode length.
+    
+    Args:
+        chunks: WAV file contents or binary file objects in playback order
+        output_path: Destination path
+    
+    Returns:
+        Path to the combined WAV file
+    """
+    params = None
+    with wave.open(str(output_path), 'wb') as output:
+        for index, chunk in enumerate(chunks):
+            source = io.BytesIO(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+            with wave.open(source, 'rb') as part:
+                part_params = (part.getnchannels(), part.getsampwidth(), part.getframerate())
+                if params is None:
+                    params = part_params
+                    output.setnchannels(params[0])
+                    output.setsampwidth(params[1])
+                    output.setframerate(params[2])
+                elif part_params != params:
+                    raise ValueError(f"Chunk {index + 1} audio format {part_params} does not match {params}")
+                
+                frames = part.readframes(FRAMES_PER_BLOCK)
+                while frames:
+                    output.writeframes(frames)
+                    frames = part.readframes(FRAMES_PER_BLOCK)
+    return output_path
+
+
+def _stitch_chunks(chunk_files: list[BinaryIO], output_path: Path) -> Path:
+    """Stitch synthesized chunk buffers into output_path and release them"""
+    try:
+        return concatenate_wav(chunk_files, output_path)
+    finally:
+        for chunk_file in chunk_files:
+            chunk_file.close()
+
+
+def text_to_speech(script_content: str, output_filename: Optional[str] = None,
+                   chunked: bool = False, max_chunk_chars: int = MAX_CHUNK_CHARS,
+                   max_workers: int = CHUNK_WORKERS, voice: Optional[dict] = None):
     """Convert podcast script to speech using Replicate Speech-02-turbo model.
     
+    In chunked mode the script is split at paragraph/sentence boundaries, the
+    chunks are synthesized concurrently as WAV and stitched together in order.
+    
     Args:
         script_content: The podcast script text to convert
-        output_filename: Name of the output audio file
+        output_filename: Name of the output audio file, defaults to a new unique temporary file
+        chunked: Synthesize size-bounded chunks in parallel
+        max_chunk_chars: Maximum characters per chunk in chunked mode
+        max_workers: Maximum concurrent chunk requests in chunked mode
+        voice: Optional VOICE_SETTINGS overriding TTS_PARAMS (e.g., another voice_id)
         
     Returns:
         Path to the generated audio file
@@ -22,51 +303,63 @@ def text_to_speech(script_content: str, output_filename: str = "podcast_audio.wa
     if not api_token:
         raise ValueError("REPLICATE_API_TOKEN not found in environment variables")
     
-    # Configure TTS parameters
-    input_params = {
-        "text": text,
-        "pitch": 0,
-        "speed": 1,
-        "volume": 1,
-        "bitrate": 128000,
-        "channel": "mono",
-        "voice_id": "Deep_Voice_Man",
-        "sample_rate": 32000,
-        "language_boost": "English",
-        "english_normalization": True
-    }
-    
     print("Starting text-to-speech conversion...")
     print(f"Text length: {len(text)} characters")
     
-    # Run the model
-    output = replicate.run(
-        "minimax/speech-02-turbo",
-        input=input_params
-    )
-    
-    # Save the audio output
-    output_path = Path(output_filename)
+    output_path = Path(output_filename) if output_filename else new_audio_path()
     
-    if hasattr(output, 'read'):
-        # If output is a file-like object, read it
-        with open(output_path, 'wb') as f:
-            f.write(output.read())
-    elif isinstance(output, str):
-        # If output is a URL, download it
-        import requests
-        response = requests.get(output)
-        response.raise_for_status()
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+    if chunked:
+        chunks = split_script(text, max_chunk_chars)
+        print(f"Synthesizing {len(chunks)} chunks with up to {max_workers} workers...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunk_files = list(executor.map(propagate(_synthesize_chunk), range(len(chunks)), chunks,
+                                            [voice] * len(chunks)))
+        _stitch_chunks(chunk_files, output_path)
     else:
-        # If output is binary data, save directly
+        # Stream the audio output to disk
         with open(output_path, 'wb') as f:
-            f.write(output)
+            _synthesize(text, f, voice)
+    
+    print(f"Audio saved to: {output_path}")
+    return output_path
+
+
+def text_to_speech_streaming(text_deltas: Iterable[str], output_filename: Optional[str] = None,
+                             max_chunk_chars: int = MAX_CHUNK_CHARS, max_workers: int = CHUNK_WORKERS):
+    """Convert a script that is still being generated to speech.
+    
+    Segments are dispatched to TTS as soon as they are complete, while the
+    text stream continues, and the WAV chunks are stitched in order at the end.
+    
+    Args:
+        text_deltas: Script text fragments in order
+        output_filename: Name of the output audio file, defaults to a new unique temporary file
+        max_chunk_chars: Maximum characters per segment
+        max_workers: Maximum concurrent segment requests
+        
+    Returns:
+        Path to the generated audio file
+    """
+    
+    api_token = os.getenv('REPLICATE_API_TOKEN')
+    if not api_token:
+        raise ValueError("REPLICATE_API_TOKEN not found in environment variables")
+    
+    print("Starting streaming text-to-speech conversion...")
+    
+    output_path = Path(output_filename) if output_filename else new_audio_path()
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, segment in enumerate(iter_speech_segments(text_deltas, max_chunk_chars)):
+            print(f"Dispatching segment {index + 1} ({len(segment)} characters) to TTS")
+            futures.append(executor.submit(propagate(_synthesize_chunk), index, segment))
+    
+    _stitch_chunks([future.result() for future in futures], output_path)
     
     print(f"Audio saved to: {output_path}")
     return output_path
 
+
 if __name__ == "__main__":
     try:
         # Example usage with file input for testing
@@ -81,4 +374,4 @@ if __name__ == "__main__":
         print(f"Successfully converted podcast script to audio: {output_file}")
     except Exception as e:
         print(f"Error: {e}")
-        exit(1)
\ No newline at end of file
+        exit(1)
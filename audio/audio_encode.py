@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import os
+import wave
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+
+# Output formats: file suffix, ffmpeg codec arguments, default bitrate and the
+# Telegram method the result is meant for (sendVoice needs OGG/Opus)
+AUDIO_FORMATS = {
+    "opus": {"suffix": ".ogg", "codec": ["-c:a", "libopus", "-application", "voip"], "bitrate": "32k", "telegram": "voice"},
+    "mp3": {"suffix": ".mp3", "codec": ["-c:a", "libmp3lame"], "bitrate": "64k", "telegram": "audio"},
+}
+
+# Assumed upload bandwidth used to estimate the upload time saved by encoding
+UPLOAD_MBPS = float(os.getenv('PODCAST_UPLOAD_MBPS', '10'))
+
+
+def ffmpeg_available() -> bool:
+    """Whether ffmpeg is installed and on the PATH"""
+    return shutil.which('ffmpeg') is not None
+
+
+def get_audio_duration(audio_path: Path) -> Optional[int]:
+    """
+    Duration of an audio file in whole seconds
+    
+    WAV files are measured directly; other formats need ffprobe.
+    
+    Args:
+        audio_path: Path to the audio file
+    
+    Returns:
+        Duration in seconds, or None if it cannot be determined
+    """
+    try:
+        with wave.open(str(audio_path), 'rb') as wav:
+            return round(wav.getnframes() / wav.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return None
+    
+    result = subprocess.run(
+        [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", str(audio_path)],
+        capture_output=True, text=True
+    )
+    try:
+        return round(float(result.stdout.strip()))
+    except ValueError:
+        return None
+
+
+def encode_audio(input_path: Path, audio_format: str = "mp3", bitrate: Optional[str] = None,
+                 output_path: Optional[Path] = None) -> dict:
+    """
+    Encode an episode into a compact speech format with ffmpeg
+    
+    Args:
+        input_path: Path to the source audio (e.g., the WAV from text_to_speech)
+        audio_format: 'opus' (OGG/Opus for sendVoice) or 'mp3' (for sendAudio)
+        bitrate: Target bitrate such as '32k'; defaults per format
+        output_path: Where to write the encoded file, defaults to a new temporary file
+    
+    Returns:
+        Dictionary with 'path', 'format', 'telegram' method, 'duration',
+        'input_bytes', 'output_bytes' and 'encode_seconds'
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    if not ffmpeg_available():
+        raise RuntimeError("ffmpeg not found on PATH")
+    
+    settings = AUDIO_FORMATS[audio_format]
+    bitrate = bitrate or settings["bitrate"]
+    
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(prefix="podcast_audio_", suffix=settings["suffix"])
+        os.close(fd)
+    output_path = Path(output_path)
+    
+    started = time.monotonic()
+    result = subprocess.run(
+        ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(input_path),
+         "-vn", "-ac", "1", *settings["codec"], "-b:a", bitrate, str(output_path)],
+        capture_output=True, text=True
+    )
+    encode_seconds = time.monotonic() - started
+    
+    if result.returncode != 0:
+        output_path.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+    
+    return {
+        "path": output_path,
+        "format": audio_format,
+        "telegram": settings["telegram"],
+        "duration": get_audio_duration(input_path),
+        "input_bytes": Path(input_path).stat().st_size,
+        "output_bytes": output_path.stat().st_size,
+        "encode_seconds": encode_seconds,
+    }
+
+
+def describe_savings(encoded: dict) -> str:
+    """
+    One-line report of the size and estimated upload time saved by encoding
+    
+    Args:
+        encoded: Result of encode_audio
+    
+    Returns:
+        Human readable summary
+    """
+    saved_bytes = encoded["input_bytes"] - encoded["output_bytes"]
+    saved_seconds = saved_bytes * 8 / (UPLOAD_MBPS * 1_000_000) - encoded["encode_seconds"]
+    ratio = encoded["input_bytes"] / max(encoded["output_bytes"], 1)
+    return (f"{encoded['input_bytes'] / 1024:.0f} KB -> {encoded['output_bytes'] / 1024:.0f} KB "
+            f"({ratio:.1f}x smaller, ~{saved_seconds:.1f}s upload time saved at {UPLOAD_MBPS:g} Mbit/s, "
+            f"encoded in {encoded['encode_seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) < 2:
+        print("Usage: python -m audio.audio_encode <audio file> [opus|mp3] [bitrate]")
+        exit(1)
+    
+    encoded = encode_audio(Path(sys.argv[1]), *sys.argv[2:4])
+    print(f"✅ Encoded to {encoded['path']} ({encoded['duration']}s)")
+    print(f"📉 {describe_savings(encoded)}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the BeautifulSoup and single-pass engines of clean_newsletter_html
+
+Checks that both engines give byte-identical output on the fixture corpus
+(plus any HTML files given on the command line, e.g. a saved
+latest_newsletter.html) and reports the throughput of each engine.
+
+With --workers N it also cleans the whole corpus several times over on N
+threads and on N worker processes (the pipeline's CPU pool), to show how
+batch cleaning scales across cores once it is out of the GIL's way.
+
+Usage:
+    python benchmarks/bench_clean_up.py [extra.html ...] [--workers N]
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from substack.substack_clean_up import clean_newsletter_html
+from benchmarks.substack_fixtures import load_fixture_corpus
+from pipeline import cpu_pool
+
+
+# Minimum measuring time per engine and fixture
+MIN_SECONDS = 0.5
+
+
+def measure(html: str, engine: str) -> float:
+    """Average seconds per call of one engine on one document"""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        clean_newsletter_html(html, engine=engine)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SECONDS:
+            return elapsed / calls
+
+
+def batch_throughput(documents: list[str], workers: int, processes: bool) -> float:
+    """MB/s of cleaning all documents concurrently on threads or on the CPU process pool"""
+    if processes:
+        cpu_pool.configure_cpu_workers(workers)
+        # Start the workers before timing, so process start-up is not measured
+        list(ThreadPoolExecutor(max_workers=workers).map(
+            lambda html: cpu_pool.run_cpu_bound(clean_newsletter_html, html, "fast"), documents[:workers]))
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda html: cpu_pool.run_cpu_bound(clean_newsletter_html, html, "fast"), documents))
+    elapsed = time.perf_counter() - started
+    return sum(len(html.encode('utf-8')) for html in documents) / elapsed / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cleaner engine benchmark and equivalence check")
+    parser.add_argument('extra', nargs='*', help="Additional HTML files to check and measure")
+    parser.add_argument('--workers', type=int, help="Also compare batch cleaning on N threads vs N processes")
+    args = parser.parse_args()
+    
+    corpus = load_fixture_corpus()
+    for extra in args.extra:
+        corpus[Path(extra).name] = Path(extra).read_text(encoding='utf-8')
+    
+    print(f"{'fixture':<28}{'size':>10}{'bs4 MB/s':>11}{'fast MB/s':>11}{'speedup':>9}  output")
+    mismatches = 0
+    total_bytes = total_bs4 = total_fast = 0.0
+    
+    for name, html in corpus.items():
+        identical = clean_newsletter_html(html, engine="bs4") == clean_newsletter_html(html, engine="fast")
+        mismatches += not identical
+        
+        size = len(html.encode('utf-8'))
+        bs4_seconds = measure(html, "bs4")
+        fast_seconds = measure(html, "fast")
+        total_bytes += size
+        total_bs4 += bs4_seconds
+        total_fast += fast_seconds
+        
+        print(f"{name:<28}{size / 1024:>8.0f}KB{size / bs4_seconds / 1e6:>11.2f}{size / fast_seconds / 1e6:>11.2f}"
+              f"{bs4_seconds / fast_seconds:>8.1f}x  {'identical' if identical else 'MISMATCH'}")
+    
+    print(f"{'total':<28}{total_bytes / 1024:>8.0f}KB{total_bytes / total_bs4 / 1e6:>11.2f}"
+          f"{total_bytes / total_fast / 1e6:>11.2f}{total_bs4 / total_fast:>8.1f}x")
+    
+    if args.workers:
+        documents = list(corpus.values()) * max(4, 2 * args.workers)
+        threads = batch_throughput(documents, args.workers, processes=False)
+        processes = batch_throughput(documents, args.workers, processes=True)
+        print(f"\nBatch of {len(documents)} documents, fast engine: {threads:.2f} MB/s on {args.workers} threads, "
+              f"{processes:.2f} MB/s on {args.workers} processes ({processes / threads:.1f}x)")
+    
+    if mismatches:
+        print(f"❌ {mismatches} fixture(s) differ between engines")
+        return 1
+    print("✅ All fixtures byte-identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end pipeline benchmark against local stand-ins of every service
+
+Runs run_newsletter_to_podcast_pipeline against the fake Substack, rss2json,
+OpenAI, Replicate and Telegram servers of benchmarks/fake_services.py, once
+per fixture of the corpus and once per --concurrency level with that many
+newsletters processed at the same time. Every scenario runs in a fresh
+interpreter with an empty state directory, so nothing is cached between
+scenarios and the peak RSS is the scenario's own.
+
+Reports end-to-end latency, throughput and peak memory per scenario, and the
+per-stage latency recorded by the pipeline metrics (stages.jsonl).
+
+Usage:
+    python benchmarks/bench_pipeline.py [--fixtures NAME ...] [--concurrency N ...]
+        [--mode plain|chunked|stream] [--latency SERVICE=SECONDS,...]
+        [--unit-latency SERVICE=SECONDS,...]
+        [--fail SERVICE=RATE,...] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.fake_services import FakeServices, SERVICES
+from benchmarks.substack_fixtures import load_fixture_corpus
+
+
+# Marks the result line a scenario process prints after the pipeline output
+RESULT_MARKER = "BENCH_RESULT "
+
+# Stage columns in pipeline order
+STAGE_ORDER = ("fetch", "clean", "script", "audio", "script+audio", "encode", "deliver")
+
+MODES = {
+    "plain": {},
+    "chunked": {"chunked_tts": True},
+    "stream": {"stream_tts": True},
+}
+
+
+def run_newsletters(newsletter_urls: list[str], options: dict) -> dict:
+    """
+    Run the pipeline for several newsletters concurrently (inside a scenario process)
+    
+    Args:
+        newsletter_urls: Newsletters to process, one channel each
+        options: Keyword options of run_newsletter_to_podcast_pipeline
+    
+    Returns:
+        Dictionary with the wall time, the per-run results and the peak RSS in MB
+    """
+    import resource
+    import main
+    
+    def timed(index: int, url: str) -> dict:
+        started = time.perf_counter()
+        try:
+            main.run_newsletter_to_podcast_pipeline(url, f"@bench{index}", force=True, **options)
+            return {"ok": True, "seconds": time.perf_counter() - started}
+        except Exception as e:
+            return {"ok": False, "seconds": time.perf_counter() - started, "error": str(e)}
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(newsletter_urls)) as executor:
+        runs = list(executor.map(timed, range(len(newsletter_urls)), newsletter_urls))
+    wall = time.perf_counter() - started
+    
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb /= 1024
+    return {"wall": wall, "runs": runs, "peak_rss_mb": peak_kb / 1024}
+
+
+def run_scenario(services: FakeServices, names: list[str], options: dict) -> dict:
+    """
+    Run one scenario in a fresh interpreter with an empty state directory
+    
+    Args:
+        services: Running fake services
+        names: Newsletters (fixture names known to the services) to process concurrently
+        options: Keyword options of run_newsletter_to_podcast_pipeline
+    
+    Returns:
+        Result of run_newsletters plus the stage records from the metrics
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as state_dir:
+        env = {**os.environ, **services.env(), "PODCAST_STATE_DIR": state_dir}
+        spec = json.dumps({"newsletter_urls": [services.newsletter_url(name) for name in names],
+                           "options": options})
+        process = subprocess.run([sys.executable, __file__, "--scenario", spec],
+                                 capture_output=True, text=True, cwd=ROOT, env=env)
+        
+        lines = [line for line in process.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+        if process.returncode != 0 or not lines:
+            raise RuntimeError(f"Scenario process failed:\n{process.stderr.strip()[-2000:]}")
+        result = json.loads(lines[-1][len(RESULT_MARKER):])
+        
+        stages_path = Path(state_dir) / 'metrics' / 'stages.jsonl'
+        lines = stages_path.read_text(encoding='utf-8').splitlines() if stages_path.exists() else []
+        result["stages"] = [json.loads(line) for line in lines]
+        return result
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(name: str, results: list[dict]) -> None:
+    """Print one scenario's latency, throughput, memory and stage breakdown"""
+    runs = [run for result in results for run in result["runs"]]
+    ok = [run["seconds"] for run in runs if run["ok"]]
+    walls = [result["wall"] for result in results]
+    episodes_per_minute = len(ok) / sum(walls) * 60 if walls else 0
+    peak = max(result["peak_rss_mb"] for result in results)
+    
+    latency = f"{statistics.median(ok):>7.2f}s{max(ok):>8.2f}s" if ok else f"{'-':>8}{'-':>9}"
+    print(f"{name:<24}{len(ok):>4}/{len(runs):<4}{latency}{statistics.median(walls):>8.2f}s"
+          f"{episodes_per_minute:>10.1f}{peak:>9.0f}MB")
+    
+    stage_seconds = defaultdict(list)
+    for result in results:
+        for stage in result["stages"]:
+            stage_seconds[stage["stage"]].append(stage["seconds"])
+    breakdown = [f"{stage} {statistics.median(stage_seconds[stage]):.2f}/{_percentile(stage_seconds[stage], 0.95):.2f}s"
+                 for stage in STAGE_ORDER if stage in stage_seconds]
+    print(f"{'':<4}stages p50/p95: {', '.join(breakdown)}")
+    
+    for run in runs:
+        if not run["ok"]:
+            print(f"{'':<4}❌ {run['error'][:160]}")
+
+
+def _parse_service_values(text: str) -> dict:
+    values = {}
+    for pair in filter(None, text.split(',')):
+        service, _, value = pair.partition('=')
+        if service not in SERVICES:
+            raise argparse.ArgumentTypeError(f"Unknown service {service!r}, expected one of {', '.join(SERVICES)}")
+        values[service] = float(value)
+    return values
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument('--fixtures', nargs='*', help="Fixture names to run (default: the whole corpus)")
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[4],
+                        help="Numbers of newsletters to process concurrently (default: 4)")
+    parser.add_argument('--mode', choices=MODES, default="plain", help="TTS mode of the pipeline")
+    parser.add_argument('--audio-format', default="wav", help="Upload format; mp3/opus need ffmpeg (default: wav)")
+    parser.add_argument('--latency', type=_parse_service_values, default={},
+                        help="Per-request latency per service, e.g. openai=0.5,replicate=2")
+    parser.add_argument('--unit-latency', type=_parse_service_values, default={},
+                        help="Seconds per completion token (openai) and per synthesized character (replicate), "
+                             "e.g. openai=0.002,replicate=0.0005")
+    parser.add_argument('--fail', type=_parse_service_values, default={},
+                        help="Failure rate per service, e.g. telegram=0.2 (429 with retry_after) or openai=0.1 (500)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scenario")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of latency jitter and failure injection")
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.scenario:
+        spec = json.loads(args.scenario)
+        result = run_newsletters(spec["newsletter_urls"], spec["options"])
+        print(RESULT_MARKER + json.dumps(result))
+        return 0
+    
+    corpus = load_fixture_corpus()
+    names = args.fixtures or list(corpus)
+    unknown = [name for name in names if name not in corpus]
+    if unknown:
+        parser.error(f"Unknown fixture(s): {', '.join(unknown)}; available: {', '.join(corpus)}")
+    
+    # Newsletter names double as URL path segments
+    posts = {Path(name).stem: html for name, html in corpus.items()}
+    scenarios = [(f"{name}", [Path(name).stem]) for name in names]
+    for count in args.concurrency:
+        stems = [Path(names[i % len(names)]).stem for i in range(count)]
+        scenarios.append((f"{count} concurrent", [f"{stem}-{i}" for i, stem in enumerate(stems)]))
+        posts.update({f"{stem}-{i}": corpus[names[i % len(names)]] for i, stem in enumerate(stems)})
+    
+    services = FakeServices(posts, args.latency, args.fail, args.seed, args.unit_latency).start()
+    options = {**MODES[args.mode], "audio_format": args.audio_format}
+    
+    print(f"Latency: {', '.join(f'{service} {seconds:g}s' for service, seconds in services.latency.items())}; "
+          f"openai {services.unit_latency['openai']:g}s/token, replicate {services.unit_latency['replicate']:g}s/char")
+    if any(services.failure_rate.values()):
+        print(f"Failure rate: {', '.join(f'{service} {rate:.0%}' for service, rate in services.failure_rate.items() if rate)}")
+    print(f"Mode: {args.mode}, format: {args.audio_format}, {args.repeat} run(s) per scenario\n")
+    print(f"{'scenario':<24}{'ok':>4} {'':<3}{'e2e p50':>8}{'e2e max':>9}{'wall':>9}{'ep/min':>10}{'peak RSS':>11}")
+    
+    failed = False
+    try:
+        for name, newsletters in scenarios:
+            results = [run_scenario(services, newsletters, options) for _ in range(args.repeat)]
+            report(name, results)
+            failed = failed or any(not run["ok"] for result in results for run in result["runs"])
+    finally:
+        services.stop()
+    
+    print(f"\nRequests (injected failures): "
+          f"{', '.join(f'{s} {services.requests[s]} ({services.failures[s]})' for s in SERVICES)}; "
+          f"uploaded {services.uploaded_bytes / 1e6:.1f} MB to Telegram")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time report for the pipeline entry point
+
+Runs `python -X importtime -c "import main"` in fresh interpreters, reports
+the median total import time, the slowest top-level imports, and whether any
+of the heavy SDKs (openai, replicate, bs4) were loaded at startup. They are
+expected to be imported only once a stage needs them.
+
+Usage:
+    python benchmarks/bench_startup.py [module ...] [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# SDKs that must not be imported until a stage needs them
+LAZY_MODULES = ("openai", "replicate", "bs4", "tiktoken")
+
+# Top-level imports listed in the report
+TOP_IMPORTS = 12
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+    
+    Args:
+        module: Module to import (e.g., 'main')
+    
+    Returns:
+        List of (module name, cumulative us, nesting level) in report order,
+        where every import follows the imports it triggered
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), int(cumulative_us), level))
+    return times
+
+
+def direct_imports(times: list[tuple[str, int, int]], module: str) -> list[tuple[int, str]]:
+    """Imports triggered directly by a module, slowest first, as (cumulative us, name)"""
+    index = next(i for i, (name, _, _) in enumerate(times) if name == module)
+    level = times[index][2]
+    
+    direct = []
+    for name, cumulative, child_level in reversed(times[:index]):
+        if child_level <= level:
+            break
+        if child_level == level + 1:
+            direct.append((cumulative, name))
+    return sorted(direct, reverse=True)
+
+
+def report(module: str, runs: int) -> bool:
+    samples = [import_times(module) for _ in range(runs)]
+    totals = [next(cumulative for name, cumulative, _ in sample if name == module) for sample in samples]
+    median = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    
+    print(f"\n{module}: {statistics.median(totals) / 1000:.1f} ms median over {runs} runs "
+          f"(min {min(totals) / 1000:.1f} ms)")
+    
+    for cumulative, name in direct_imports(median, module)[:TOP_IMPORTS]:
+        print(f"   {cumulative / 1000:>8.1f} ms  {name}")
+    
+    imported = {name for name, _, _ in median}
+    loaded = [name for name in LAZY_MODULES if name in imported]
+    if loaded:
+        print(f"   ❌ Loaded at startup: {', '.join(loaded)}")
+    else:
+        print(f"   ✅ None of {', '.join(LAZY_MODULES)} loaded at startup")
+    return not loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time report")
+    parser.add_argument('modules', nargs='*', default=["main"], help="Modules to import (default: main)")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args()
+    
+    ok = True
+    for module in args.modules:
+        ok = report(module, args.runs) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-ins for the services the pipeline talks to
+
+One threaded HTTP server mimics, under path prefixes:
+
+    /substack/<newsletter>/feed      RSS feed (ETag / 304 support)
+    /substack/<newsletter>/p/<slug>  post page
+    /rss2json/v1/api.json            rss2json proxy
+    /openai/v1/chat/completions      OpenAI chat completions (plain and streamed)
+    /replicate/v1/...                Replicate predictions and output files
+    /telegram/bot<token>/<method>    Telegram Bot API
+
+Every service has a configurable per-request latency (plus jitter) and
+failure rate; failures answer 500, or 429 with retry_after for Telegram.
+Completions additionally take time per generated token and speech synthesis
+time per character, so long and split requests cost what they would live. Point the pipeline
+at the server with the environment returned by FakeServices.env().
+"""
+
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import wave
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from benchmarks.substack_fixtures import WORDS
+
+
+SERVICES = ("substack", "openai", "replicate", "telegram")
+
+# Default per-request latency in seconds per service (time to first token for
+# completions), roughly the live services' order of magnitude
+DEFAULT_LATENCY = {"substack": 0.05, "openai": 0.4, "replicate": 0.5, "telegram": 0.15}
+
+# Default generation time in seconds per unit: completion token for OpenAI,
+# synthesized character for Replicate
+DEFAULT_UNIT_LATENCY = {"openai": 0.001, "replicate": 0.001}
+
+# Latency varies uniformly by this fraction
+JITTER = 0.2
+
+# Speech rate and sample rate of the generated audio
+SPOKEN_CHARS_PER_SECOND = 15
+SAMPLE_RATE = 8000
+
+# Generated script words per completion token
+WORDS_PER_TOKEN = 0.75
+
+# Chunks of a streamed completion
+STREAM_CHUNKS = 20
+
+# retry_after sent with injected Telegram 429 responses
+TELEGRAM_RETRY_AFTER = 1
+
+
+def generate_script(words: int, seed: int) -> str:
+    """Deterministic spoken-style text with paragraph breaks"""
+    rng = random.Random(seed)
+    paragraphs = []
+    while words > 0:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            sentence = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+            words -= len(sentence)
+            sentences.append(" ".join(sentence).capitalize() + ".")
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def generate_wav(characters: int) -> bytes:
+    """Silent mono WAV as long as the given text would take to speak"""
+    frames = int(characters / SPOKEN_CHARS_PER_SECOND * SAMPLE_RATE)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(SAMPLE_RATE)
+        output.writeframes(b'\0\0' * frames)
+    return buffer.getvalue()
+
+
+class FakeServices:
+    def __init__(self, posts: dict[str, str], latency: dict = None, failure_rate: dict = None, seed: int = 0,
+                 unit_latency: dict = None):
+        """
+        Fake Substack, rss2json, OpenAI, Replicate and Telegram on one local port
+        
+        Args:
+            posts: Newsletter name -> HTML of its latest post
+            latency: Service -> seconds per request, defaults to DEFAULT_LATENCY
+            failure_rate: Service -> fraction of requests answered with an error
+            seed: Seed of the jitter and failure injection
+            unit_latency: Service -> seconds per completion token (openai) or
+                synthesized character (replicate), defaults to DEFAULT_UNIT_LATENCY
+        """
+        self.posts = posts
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.unit_latency = {service: 0.0 for service in SERVICES}
+        self.unit_latency.update({**DEFAULT_UNIT_LATENCY, **(unit_latency or {})})
+        self.failure_rate = {service: 0.0 for service in SERVICES}
+        self.failure_rate.update(failure_rate or {})
+        self.requests = {service: 0 for service in SERVICES}
+        self.failures = {service: 0 for service in SERVICES}
+        self.uploaded_bytes = 0
+        self._audio: dict[str, bytes] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "FakeServices":
+        """Serve on a free local port from a background thread"""
+        services = self
+        
+        class Handler(FakeServiceHandler):
+            fake = services
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def newsletter_url(self, name: str) -> str:
+        return f"{self.base_url}/substack/{name}"
+    
+    def env(self) -> dict:
+        """
+        Environment variables pointing the pipeline at the fake services
+        
+        Returns:
+            Dictionary of variable name -> value
+        """
+        return {
+            "RSS2JSON_API_URL": f"{self.base_url}/rss2json/v1/api.json",
+            "PODCAST_FEED_SOURCES": "rss2json,direct",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "OPENAI_API_KEY": "bench",
+            "REPLICATE_BASE_URL": f"{self.base_url}/replicate",
+            "REPLICATE_API_TOKEN": "bench",
+            "REPLICATE_POLL_INTERVAL": "0.05",
+            "TELEGRAM_API_URL": f"{self.base_url}/telegram",
+            "TELEGRAM_API_BOT": "bench",
+        }
+    
+    def delay(self, service: str) -> float:
+        with self._lock:
+            return self.latency[service] * self._rng.uniform(1 - JITTER, 1 + JITTER)
+    
+    def generation_delay(self, service: str, units: int) -> float:
+        """Seconds to generate the given number of tokens or characters, on top of delay()"""
+        with self._lock:
+            return units * self.unit_latency[service] * self._rng.uniform(1 - JITTER, 1 + JITTER)
+    
+    def should_fail(self, service: str) -> bool:
+        with self._lock:
+            self.requests[service] += 1
+            failed = self._rng.random() < self.failure_rate[service]
+            self.failures[service] += failed
+            return failed
+    
+    def store_audio(self, audio: bytes) -> str:
+        audio_id = uuid.uuid4().hex
+        with self._lock:
+            self._audio[audio_id] = audio
+        return audio_id
+    
+    def take_audio(self, audio_id: str) -> bytes:
+        with self._lock:
+            return self._audio.pop(audio_id, None)
+    
+    def count_upload(self, size: int) -> None:
+        with self._lock:
+            self.uploaded_bytes += size
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the pipeline's pooled sessions behave as against the real APIs
+    protocol_version = "HTTP/1.1"
+    fake: FakeServices = None
+    
+    ROUTES = (
+        ("GET", re.compile(r"/substack/(?P<name>[\w-]+)/feed$"), "substack", "feed"),
+        ("GET", re.compile(r"/substack/(?P<name>[\w-]+)/p/(?P<slug>[\w-]+)$"), "substack", "post"),
+        ("GET", re.compile(r"/rss2json/v1/api\.json$"), "substack", "rss2json"),
+        ("POST", re.compile(r"/openai/v1/chat/completions$"), "openai", "completion"),
+        ("POST", re.compile(r"/replicate/v1/models/[\w.-]+/[\w.-]+/predictions$"), "replicate", "prediction"),
+        ("GET", re.compile(r"/replicate/files/(?P<audio_id>\w+)\.wav$"), "replicate", "audio"),
+        ("POST", re.compile(r"/telegram/bot[^/]+/(?P<method>\w+)$"), "telegram", "bot_method"),
+    )
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        self._dispatch("GET")
+    
+    def do_POST(self):
+        self._dispatch("POST")
+    
+    def _read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+    
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json(self, data: dict, status: int = 200, headers: dict = None):
+        self._send(status, json.dumps(data).encode('utf-8'), headers=headers)
+    
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        body = self._read_body() if method == "POST" else b""
+        
+        for route_method, pattern, service, handler in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            self._send_json({"error": f"No stand-in for {method} {url.path}"}, 404)
+            return
+        
+        if service == "telegram" and handler == "bot_method":
+            self.fake.count_upload(len(body))
+        
+        # Completions pace their own response (time to first token, then per token)
+        time.sleep(self.fake.delay(service) if handler != "completion" else 0)
+        if self.fake.should_fail(service):
+            if service == "telegram":
+                self._send_json({"ok": False, "error_code": 429, "description": "Too Many Requests: retry later",
+                                 "parameters": {"retry_after": TELEGRAM_RETRY_AFTER}}, 429)
+            else:
+                self._send_json({"error": {"message": "Injected failure", "type": "server_error"}}, 500)
+            return
+        
+        getattr(self, f"_{handler}")(url, body, **match.groupdict())
+    
+    def _post_link(self, name: str) -> str:
+        return f"{self.fake.newsletter_url(name)}/p/{name}-latest"
+    
+    def _feed(self, url, body, name):
+        if name not in self.fake.posts:
+            self._send_json({"error": "Unknown newsletter"}, 404)
+            return
+        etag = f'"{name}-1"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        link = self._post_link(name)
+        feed = (f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+                f'<title>{escape(name)}</title><link>{escape(self.fake.newsletter_url(name))}</link>'
+                f'<item><title>Latest issue</title><link>{escape(link)}</link><guid>{escape(link)}</guid>'
+                f'<pubDate>{formatdate(usegmt=True)}</pubDate><description>Latest issue of {escape(name)}</description></item>'
+                f'</channel></rss>')
+        self._send(200, feed.encode('utf-8'), "application/rss+xml; charset=utf-8",
+                   {"ETag": etag, "Last-Modified": formatdate(usegmt=True)})
+    
+    def _post(self, url, body, name, slug):
+        if name not in self.fake.posts:
+            self._send_json({"error": "Unknown newsletter"}, 404)
+            return
+        self._send(200, self.fake.posts[name].encode('utf-8'), "text/html; charset=utf-8")
+    
+    def _rss2json(self, url, body):
+        feed_url = parse_qs(url.query).get('rss_url', [''])[0]
+        match = re.search(r"/substack/([\w-]+)/feed", feed_url)
+        if not match or match.group(1) not in self.fake.posts:
+            self._send_json({"status": "error", "message": "Cannot download this RSS feed"})
+            return
+        name = match.group(1)
+        link = self._post_link(name)
+        self._send_json({"status": "ok", "feed": {"url": feed_url}, "items": [{
+            "title": "Latest issue", "link": link, "guid": link,
+            "description": f"Latest issue of {name}", "content": self.fake.posts[name],
+        }]})
+    
+    def _completion(self, url, body):
+        request = json.loads(body)
+        prompt = "".join(message["content"] for message in request["messages"])
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = int(request.get("max_tokens", 1000) * 0.8)
+        script = generate_script(int(completion_tokens * WORDS_PER_TOKEN), seed=len(prompt))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        latency = self.fake.delay("openai")
+        
+        if not request.get("stream"):
+            time.sleep(latency + self.fake.generation_delay("openai", completion_tokens))
+            self._send_json({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                "model": request["model"], "usage": usage,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": script}}],
+            })
+            return
+        
+        # Server-sent events: first token after the request latency, then each chunk at the token rate
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        
+        def event(delta: dict = None, finish_reason=None, chunk_usage=None) -> bytes:
+            choices = [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": request["model"], "choices": choices, "usage": chunk_usage}
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+        
+        time.sleep(latency)
+        step = max(1, len(script) // STREAM_CHUNKS)
+        for start in range(0, len(script), step):
+            chunk = script[start:start + step]
+            time.sleep(self.fake.generation_delay("openai", completion_tokens * len(chunk) // len(script)))
+            self.wfile.write(event({"content": chunk}))
+            self.wfile.flush()
+        self.wfile.write(event({}, "stop"))
+        if request.get("stream_options", {}).get("include_usage"):
+            self.wfile.write(event(chunk_usage=usage))
+        self.wfile.write(b"data: [DONE]\n\n")
+    
+    def _prediction(self, url, body):
+        request = json.loads(body)
+        text = request["input"]["text"]
+        time.sleep(self.fake.generation_delay("replicate", len(text)))
+        audio_id = self.fake.store_audio(generate_wav(len(text)))
+        prediction_id = uuid.uuid4().hex[:16]
+        self._send_json({
+            "id": prediction_id, "model": "bench/tts", "version": "bench", "status": "succeeded",
+            "input": request["input"], "output": f"{self.fake.base_url}/replicate/files/{audio_id}.wav",
+            "logs": "", "error": None, "metrics": {"predict_time": 0.1},
+            "created_at": "2025-01-01T00:00:00Z", "started_at": "2025-01-01T00:00:00Z",
+            "completed_at": "2025-01-01T00:00:01Z",
+            "urls": {"get": f"{self.fake.base_url}/replicate/v1/predictions/{prediction_id}",
+                     "cancel": f"{self.fake.base_url}/replicate/v1/predictions/{prediction_id}/cancel"},
+        }, 201)
+    
+    def _audio(self, url, body, audio_id):
+        audio = self.fake.take_audio(audio_id)
+        if audio is None:
+            self._send_json({"error": "Unknown file"}, 404)
+            return
+        self._send(200, audio, "audio/wav")
+    
+    def _bot_method(self, url, body, method):
+        message_id = random.randint(1, 10**6)
+        if method in ("sendAudio", "sendVoice"):
+            media = "voice" if method == "sendVoice" else "audio"
+            self._send_json({"ok": True, "result": {"message_id": message_id,
+                                                    media: {"file_id": f"bench-{uuid.uuid4().hex[:12]}"}}})
+        elif method == "sendMessage":
+            self._send_json({"ok": True, "result": {"message_id": message_id}})
+        else:
+            self._send_json({"ok": False, "error_code": 404, "description": "Not Found: method not found"}, 404)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic Substack-like post pages for benchmarks
+
+Pages follow the structure of real Substack post HTML: a head with meta tags,
+inline styles and a large preload script, a navigation bar, the post body
+(paragraphs, headings, links, captioned images, lists, blockquotes, subscribe
+widgets) and a footer.
+"""
+
+import random
+from pathlib import Path
+
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+WORDS = ("the city weekend market festival music open air new opening cafe gallery tickets free "
+         "family friendly concert evening morning weather sunny rain forecast local news council "
+         "announced project street park museum exhibition theatre film food wine tasting workshop").split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ".", "!", "?"])
+
+
+def _inline(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 5)):
+        text = _sentence(rng)
+        roll = rng.random()
+        if roll < 0.2:
+            text = f'<a href="https://example.com/{rng.randint(1, 999)}" rel="nofollow">{text}</a>'
+        elif roll < 0.35:
+            text = f'<strong>{text}</strong>'
+        elif roll < 0.45:
+            text = f'<em>{text}</em> &amp; more&nbsp;info&#8217;s'
+        elif roll < 0.5:
+            text = f'<span class="mention">{text}</span>'
+        parts.append(text)
+    return " ".join(parts)
+
+
+def _figure(rng: random.Random) -> str:
+    image = f"https://substackcdn.com/image/fetch/w_1456,c_limit,f_auto/{rng.randint(10**8, 10**9)}.jpeg"
+    return (f'<div class="captioned-image-container"><figure><a class="image-link" href="{image}">'
+            f'<div class="image2-inset"><picture><source type="image/webp" srcset="{image} 424w, {image} 848w"/>'
+            f'<img src="{image}" width="1456" height="816" alt="" loading="lazy"/></picture></div></a>'
+            f'<figcaption class="image-caption">{_sentence(rng)}</figcaption></figure></div>')
+
+
+def _subscribe_widget() -> str:
+    return ('<div class="subscription-widget-wrap"><div class="subscription-widget show-subscribe">'
+            '<div class="preamble"><p>Thanks for reading! Subscribe for free to receive new posts.</p></div>'
+            '<form class="subscription-widget-subscribe"><input type="email" class="email-input" name="email" '
+            'placeholder="Type your email…" tabindex="-1"><input type="submit" class="button primary" value="Subscribe">'
+            '<div class="fake-input-wrapper"><div class="fake-input"></div><div class="fake-button"></div></div></form></div></div>')
+
+
+def generate_post_page(paragraphs: int, seed: int = 0) -> str:
+    """
+    Build a Substack-like post page
+    
+    Args:
+        paragraphs: Number of body paragraphs (controls the page size)
+        seed: Random seed, the same seed always gives the same page
+    
+    Returns:
+        HTML document
+    """
+    rng = random.Random(seed)
+    preload = ",".join(f'{{"id":{i},"body_html":"\\u003cp\\u003e{_sentence(rng)}\\u003c/p\\u003e"}}' for i in range(paragraphs // 2))
+    
+    body = []
+    for index in range(paragraphs):
+        roll = rng.random()
+        if index % 12 == 0:
+            level = rng.choice([2, 3])
+            body.append(f'<h{level} class="header-anchor-post">{_sentence(rng)}'
+                        f'<div class="header-anchor-parent"><div class="header-anchor-widget"></div></div></h{level}>')
+        if roll < 0.08:
+            body.append(_figure(rng))
+        elif roll < 0.14:
+            items = "".join(f"<li><p>{_inline(rng)}</p></li>" for _ in range(rng.randint(2, 6)))
+            body.append(f"<ul>{items}</ul>")
+        elif roll < 0.18:
+            body.append(f"<blockquote><p>{_inline(rng)}</p></blockquote>")
+        elif roll < 0.2:
+            body.append(_subscribe_widget())
+        elif roll < 0.22:
+            body.append('<div><hr></div>')
+        else:
+            body.append(f"<p>{_inline(rng)}</p>")
+    
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{_sentence(rng)} - Local Weekly</title>
+<meta property="og:title" content="Local Weekly">
+<link rel="stylesheet" href="https://substackcdn.com/bundle/theme/main.css">
+<style>.post {{ max-width: 728px; }} .button.primary {{ color: #fff; }}</style>
+<script>window._preloads = JSON.parse("[{preload}]")</script>
+</head>
+<body>
+<div id="entry"><div class="main-menu"><div class="topbar-content">
+<a href="/" class="navbar-title-link">Local Weekly</a>
+<div class="navbar-buttons"><button class="button primary">Subscribe</button><button class="button">Sign in</button></div>
+</div></div>
+<div class="single-post-container"><div class="container"><div class="single-post">
+<div class="post-header"><h1 class="post-title published">{_sentence(rng)}</h1>
+<h3 class="subtitle">{_sentence(rng)}</h3>
+<div class="post-meta"><span class="pencraft">{rng.randint(1, 28)} Oct</span> <a href="/p/comments">12</a></div></div>
+<div class="available-content"><div class="body markup" dir="auto">
+{chr(10).join(body)}
+</div></div>
+{_subscribe_widget()}
+</div></div></div>
+<div class="footer-wrap"><div class="footer"><div class="footer-text">© 2025 Local Weekly</div>
+<div class="footer-terms"><a href="/privacy">Privacy</a> ∙ <a href="/tos">Terms</a> ∙ <a href="https://substack.com/notice">Collection notice</a></div>
+<a class="footer-substack-cta" href="https://substack.com/signup">Start Writing</a><a href="https://substack.com/app">Get the app</a>
+<p>Substack is the home for great culture</p></div></div>
+</div>
+<script src="https://substackcdn.com/bundle/static/js/main.js" async></script>
+</body>
+</html>
+"""
+
+
+def load_fixture_corpus() -> dict[str, str]:
+    """
+    Handwritten fixtures plus generated pages from small to very large
+    
+    Returns:
+        Dictionary of fixture name -> HTML
+    """
+    corpus = {path.name: path.read_text(encoding='utf-8') for path in sorted(FIXTURES_DIR.glob('*.html'))}
+    for paragraphs in (20, 80, 300, 1200):
+        corpus[f"generated_{paragraphs}p.html"] = generate_post_page(paragraphs, seed=paragraphs)
+    return corpus
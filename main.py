@@ -3,94 +3,775 @@
 
 import os
 import sys
+import json
+import time
+import signal
+import argparse
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Callable, Optional, Union
 
 # Add current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from substack.substack_pull_data import get_latest_newsletter_html
-from substack.substack_clean_up import clean_newsletter_html
-from ai.newsletter_to_podcast_transcript import transform_newsletter_to_podcast
-from ai.transcript_tts import text_to_speech
+from substack.substack_pull_data import get_latest_post, get_post_html, list_posts
+from substack.substack_clean_up import clean_newsletter_html, CLEANER_VERSION
+from ai.newsletter_to_podcast_transcript import (transform_newsletter_to_podcast, stream_podcast_script, get_script_cache_params,
+                                                 translate_script, get_translation_cache_params)
+from ai.transcript_tts import text_to_speech, text_to_speech_streaming, get_tts_cache_params
+from audio.audio_encode import encode_audio, ffmpeg_available, get_audio_duration, describe_savings, AUDIO_FORMATS
 from telegram.telegram_bot import TelegramBot
+from pipeline.provider_limits import provider_slot, configure_provider_limits
+from pipeline.cpu_pool import run_cpu_bound, configure_cpu_workers
+from pipeline.http_clients import close_clients
+from pipeline.seen_posts import get_seen_post_store
+from pipeline.paragraph_index import get_paragraph_index
+from pipeline.stage_cache import get_stage_cache, StageCache
+from pipeline.run_journal import get_run_journal, variant_stage, PipelineRun, RUN_STAGES
+from pipeline.poll_scheduler import PollScheduler
+from pipeline.metrics import RunMetrics, get_metrics_exporter, record
+from pipeline.variants import normalize_variants
+from pipeline.publish_order import PublishOrder
+
+
+# Keyword options of run_newsletter_to_podcast_pipeline that can be set from
+# the command line or from the top level of a batch configuration file
+PIPELINE_OPTIONS = ("force", "chunked_tts", "stream_tts", "audio_format", "audio_bitrate", "keep_repeated", "variants")
+
+# Longest time the daemon sleeps before checking for a stop request
+DAEMON_TICK_SECONDS = 30
+
+# Posts of a backfill processed concurrently, unless the batch configuration sets max_workers
+BACKFILL_WORKERS = int(os.getenv('PODCAST_BACKFILL_WORKERS', '4'))
+
+
+def generate_streaming_episode(cache: StageCache, clean_text: str, output_path: Path) -> tuple[str, Path]:
+    """
+    Generate the script and the audio with TTS overlapping the LLM generation
+    
+    The chat completion is consumed as a stream and every complete segment is
+    sent to TTS while generation continues. When the script is already cached,
+    it falls back to chunked TTS of the cached script.
+    
+    Args:
+        cache: Stage cache for scripts and audio
+        clean_text: Cleaned newsletter text
+        output_path: Where the assembled episode should be written
+    
+    Returns:
+        Tuple of (podcast script, path to the audio file)
+    """
+    script_key = cache.make_key("script", clean_text, get_script_cache_params())
+    cached_script = cache.lookup("script", script_key)
+    
+    if cached_script is not None:
+        print("♻️  Cache hit for script stage")
+        podcast_script = cached_script.read_text(encoding='utf-8')
+        audio_path = cache.cached_file("audio", podcast_script, get_tts_cache_params(chunked=True),
+                                       lambda path: text_to_speech(podcast_script, str(path), chunked=True),
+                                       output_path)
+        return podcast_script, audio_path
+    
+    script_parts = []
+    
+    def script_deltas():
+        for delta in stream_podcast_script(clean_text):
+            script_parts.append(delta)
+            yield delta
+    
+    audio_path = text_to_speech_streaming(script_deltas(), str(output_path))
+    podcast_script = "".join(script_parts)
+    
+    cache.store_text(script_key, podcast_script)
+    cache.store(cache.make_key("audio", podcast_script, get_tts_cache_params(chunked=True)), audio_path)
+    return podcast_script, audio_path
+
+
+def produce_variant(run: PipelineRun, metrics: RunMetrics, podcast_script: str, variant: dict,
+                    episode_title: str, post_url: str, chunked_tts: bool, audio_format: str,
+                    audio_bitrate: Optional[str], delivery_turn: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Synthesize, encode and deliver one audio variant of an episode
+    
+    The main episode is the variant named None, with the default voice. Each
+    step is checkpointed under the variant's own journal keys, so a resumed
+    run only redoes what is missing for each variant.
+    
+    Args:
+        run: Journal of the pipeline run
+        metrics: Stage measurements of the run
+        podcast_script: Shared podcast script
+        variant: Variant from normalize_variants (language, voice settings and channels)
+        episode_title: Title of the episode
+        post_url: Newsletter post URL
+        chunked_tts: Synthesize the script in parallel chunks
+        audio_format: Upload format: 'mp3', 'opus' or 'wav'
+        audio_bitrate: Encoder bitrate, defaults per format
+        delivery_turn: Optional callable that blocks until the episode may be delivered
+    
+    Returns:
+        Dictionary with the Telegram response per channel ('responses'), the
+        channels that did not get the episode ('failed'), the 'upload_path' and
+        the 'duration' in seconds
+    """
+    name, language = variant["name"], variant["language"]
+    label = f" [{name}]" if name else ""
+    suffix = f"-{name}" if name else ""
+    cache = get_stage_cache()
+    
+    # Step 4: Convert to audio, translating the script first for language variants
+    tts_params = get_tts_cache_params(chunked_tts, variant["voice"])
+    audio_params = {**tts_params, "translation": get_translation_cache_params(language)} if language else tts_params
+    audio_stage = variant_stage("audio", name)
+    if run.is_done(audio_stage, audio_params):
+        audio_path = run.artifact_path(audio_stage)
+    else:
+        script = podcast_script
+        if language:
+            print(f"\n🌐 Translating script{label} to {language}...")
+            with metrics.stage(variant_stage("translate", name)):
+                script = cache.cached_text("translate", podcast_script, get_translation_cache_params(language),
+                                           lambda: translate_script(podcast_script, language))
+                record(bytes_in=len(podcast_script.encode('utf-8')), bytes_out=len(script.encode('utf-8')))
+        
+        print(f"\n🔊 Step 4{label}: Converting to audio...")
+        with metrics.stage(audio_stage):
+            audio_path = cache.cached_file("audio", script, tts_params,
+                                           lambda path: text_to_speech(script, str(path), chunked=chunked_tts,
+                                                                       voice=variant["voice"]),
+                                           run.path(f"episode{suffix}.wav"))
+            record(bytes_in=len(script.encode('utf-8')), bytes_out=audio_path.stat().st_size)
+        run.record_stage(audio_stage, artifact=audio_path, params=audio_params)
+    print(f"✅ Audio generated{label}: {audio_path}")
+    
+    # Step 4b: Encode to a compact speech format before upload
+    encode_params = {"format": audio_format, "bitrate": audio_bitrate}
+    encode_stage = variant_stage("encode", name)
+    if run.is_done(encode_stage, encode_params):
+        upload_path = run.artifact_path(encode_stage)
+        as_voice, duration = run.stage(encode_stage)["as_voice"], run.stage(encode_stage)["duration"]
+    else:
+        with metrics.stage(encode_stage):
+            upload_path, as_voice = audio_path, False
+            duration = get_audio_duration(audio_path)
+            if audio_format != "wav":
+                if ffmpeg_available():
+                    print(f"\n🗜️  Encoding audio{label} to {audio_format}...")
+                    encoded = encode_audio(audio_path, audio_format, audio_bitrate,
+                                           run.path(f"episode{suffix}" + AUDIO_FORMATS[audio_format]["suffix"]))
+                    upload_path, as_voice = encoded["path"], encoded["telegram"] == "voice"
+                    duration = encoded["duration"] or duration
+                    print(f"✅ Audio encoded{label}: {describe_savings(encoded)}")
+                else:
+                    print("⚠️  ffmpeg not found, uploading the uncompressed audio")
+            record(bytes_in=Path(audio_path).stat().st_size, bytes_out=Path(upload_path).stat().st_size)
+        run.record_stage(encode_stage, artifact=upload_path, params=encode_params, as_voice=as_voice, duration=duration)
+    
+    # Step 5: Send to Telegram
+    bot = TelegramBot()
+    
+    # Channels that got the episode in an earlier attempt are not sent it again
+    deliver_stage = variant_stage("deliver", name)
+    delivered = dict(run.stage(deliver_stage).get("channels", {}))
+    file_id = run.stage(deliver_stage).get("file_id")
+    pending = [target for target in variant["channels"] if str(target) not in delivered]
+    responses = {target: {"ok": True, "result": {"message_id": delivered[str(target)]}, "resumed": True}
+                 for target in variant["channels"] if str(target) in delivered}
+    
+    if pending:
+        if delivery_turn is not None:
+            delivery_turn()
+        print(f"\n📱 Step 5{label}: Sending to Telegram channel(s) {', '.join(map(str, pending))}...")
+        
+        # Upload once, the other channels get the episode by file_id
+        with metrics.stage(deliver_stage), provider_slot("telegram"):
+            sent = bot.broadcast_podcast_episode(pending, str(upload_path), episode_title, post_url,
+                                                 duration, as_voice, file_id)
+            record(bytes_in=Path(upload_path).stat().st_size)
+        responses.update(sent)
+        
+        for target_channel, response in sent.items():
+            if response.get('ok'):
+                delivered[str(target_channel)] = response['result']['message_id']
+                media = response['result'].get('voice' if as_voice else 'audio', {})
+                file_id = file_id or media.get('file_id')
+                print(f"✅ Sent podcast{label} to {target_channel} (message ID: {response['result']['message_id']})")
+            else:
+                print(f"❌ Telegram error for {target_channel}: {response.get('description', 'Unknown error')}")
+    
+    failed = [str(target) for target in variant["channels"] if str(target) not in delivered]
+    run.record_stage(deliver_stage, done=not failed, channels=delivered, file_id=file_id)
+    return {"responses": responses, "failed": failed, "upload_path": upload_path, "duration": duration}
 
 
 def run_newsletter_to_podcast_pipeline(newsletter_url: str = "https://giadafromgamma.substack.com", 
-                                     channel_id: str = "-1003291063219"):
+                                     channel_id: Union[str, list[str]] = "-1003291063219",
+                                     force: bool = False,
+                                     chunked_tts: bool = False,
+                                     stream_tts: bool = False,
+                                     audio_format: str = "mp3",
+                                     audio_bitrate: Optional[str] = None,
+                                     keep_repeated: bool = False,
+                                     variants: Optional[list[dict]] = None,
+                                     resume_run_id: Optional[str] = None,
+                                     post: Optional[dict] = None,
+                                     delivery_turn: Optional[Callable[[], None]] = None) -> dict:
     """
     Complete pipeline: Newsletter -> Clean Text -> Podcast Script -> Audio -> Telegram
     
+    Besides the main episode, audio variants (other voices, speeds or languages)
+    can be produced from the same script and delivered to their own channels;
+    they are synthesized concurrently and the script is generated only once.
+    
+    Every stage is checkpointed in the run journal. An interrupted run of the
+    newsletter is resumed at its first incomplete stage before new posts are
+    looked for, and channels that already received the episode are skipped.
+    
     Args:
         newsletter_url: Substack newsletter URL
-        channel_id: Telegram channel ID (e.g., '@channelname' or '-1001234567890')
+        channel_id: Telegram channel ID (e.g., '@channelname' or '-1001234567890'),
+                    or a list of channel IDs that should all receive the episode
+        force: Process the latest post even if it was already delivered, discarding its journal
+        chunked_tts: Synthesize the script in parallel chunks and stitch the audio
+        stream_tts: Start TTS on complete segments while the script is still being generated
+        audio_format: Upload format: 'mp3' (sendAudio), 'opus' (OGG voice message) or 'wav' (no encoding)
+        audio_bitrate: Encoder bitrate such as '48k', defaults per format
+        keep_repeated: Keep paragraphs that already appeared in recent issues
+        variants: Additional audio variants with their own channels (see normalize_variants)
+        resume_run_id: Resume this journaled run instead of fetching the latest post
+        post: Process this post (see list_posts) instead of the latest one; its
+              own journal is continued if an earlier run did not complete
+        delivery_turn: Optional callable that blocks until the episode may be
+                       delivered, to keep backfilled episodes in publish order
+    
+    Returns:
+        Summary dictionary with the run ID, the post URL and the Telegram response per channel
+        ('skipped' is True when there was no new post, or the given post was already delivered;
+        'resumed' is True when an earlier attempt was continued; 'published' is the post's
+        publish time from the feed, if known)
     """
     
+    channel_ids = [channel_id] if isinstance(channel_id, (str, int)) else list(channel_id)
+    options = {"chunked_tts": chunked_tts, "stream_tts": stream_tts, "audio_format": audio_format,
+               "audio_bitrate": audio_bitrate, "keep_repeated": keep_repeated, "variants": variants}
+    episode_variants = [{"name": None, "channels": channel_ids, "language": None, "voice": {}}]
+    episode_variants += normalize_variants(variants)
+    targets = [str(target) for variant in episode_variants for target in variant["channels"]]
+    if len(set(targets)) != len(targets):
+        raise ValueError("Each channel can receive only one variant of the episode")
+    seen_posts = get_seen_post_store()
+    cache = get_stage_cache()
+    journal = get_run_journal()
+    metrics = RunMetrics(newsletter_url)
+    outcome = "failed"
+    run = None
+    
     print("🚀 Starting Newsletter to Podcast Pipeline")
     print("=" * 50)
     
     try:
-        # Step 1: Pull latest newsletter data
-        print("📰 Step 1: Fetching latest newsletter...")
-        html_content, latest_post_url = get_latest_newsletter_html(newsletter_url)
+        # Resume an interrupted run of this newsletter before looking for new posts
+        if resume_run_id:
+            resumed = journal.load(resume_run_id)
+            if not resumed.is_done("fetch"):
+                raise ValueError(f"Run {resume_run_id} cannot be resumed: it has no fetched post to continue from")
+            run = resumed
+            run.begin_attempt()
+        elif post is None and not force:
+            run = journal.find_resumable(newsletter_url)
+            if run is not None:
+                run.begin_attempt()
+        
+        if run is not None:
+            print(f"⏯️  Resuming run {run.run_id} (attempt {run.attempts}) at stage {run.next_stage()}")
+            latest_post = run.post
+            html_content = run.artifact_path("fetch").read_text(encoding='utf-8')
+        else:
+            html_content = None
+            if post is None:
+                with metrics.stage("fetch"):
+                    # Step 1: Pull latest newsletter data
+                    print("📰 Step 1: Fetching latest newsletter...")
+                    with provider_slot("substack"):
+                        latest_post = get_latest_post(newsletter_url, None if force else seen_posts)
+                        
+                        if latest_post is None:
+                            print("💤 No new post since the last delivered episode, nothing to do")
+                            outcome = "skipped"
+                            return {"newsletter_url": newsletter_url, "run_id": None, "post_url": None,
+                                    "skipped": True, "responses": {}}
+                        
+                        html_content = get_post_html(latest_post)
+                    record(bytes_in=len(html_content.encode('utf-8')))
+            else:
+                latest_post = post
+                if not force and seen_posts.is_processed(post["feed_url"], post["link"], post["guid"]):
+                    print(f"💤 Post already delivered: {post['link']}")
+                    outcome = "skipped"
+                    return {"newsletter_url": newsletter_url, "run_id": None, "post_url": post["link"],
+                            "skipped": True, "responses": {}}
+            
+            run = journal.start(newsletter_url, latest_post, channel_ids, options, fresh=force)
+            if run.status == "abandoned":
+                print(f"⛔ Run {run.run_id} for this post failed {run.attempts} times, "
+                      f"resume it with --resume {run.run_id}")
+                outcome = "abandoned"
+                return {"newsletter_url": newsletter_url, "run_id": run.run_id, "post_url": latest_post["link"],
+                        "skipped": True, "responses": {}}
+            if run.is_done("fetch") and html_content is None:
+                html_content = run.artifact_path("fetch").read_text(encoding='utf-8')
+            elif not run.is_done("fetch"):
+                if html_content is None:
+                    with metrics.stage("fetch"):
+                        # Step 1: Pull the given post
+                        print(f"📰 Step 1: Fetching post {latest_post['link']}...")
+                        with provider_slot("substack"):
+                            html_content = get_post_html(latest_post)
+                        record(bytes_in=len(html_content.encode('utf-8')))
+                post_path = run.path("post.html")
+                post_path.write_text(html_content, encoding='utf-8')
+                run.record_stage("fetch", artifact=post_path)
+        latest_post_url = latest_post["link"]
+        metrics.run_id, metrics.post_url = run.run_id, latest_post_url
         print(f"✅ Newsletter fetched ({len(html_content)} characters)")
-        print(f"📄 Latest post URL: {latest_post_url}")
+        print(f"📄 Latest post URL: {latest_post_url} (run {run.run_id})")
         
         # Step 2: Clean up HTML to text
         print("\n🧹 Step 2: Cleaning newsletter HTML...")
-        clean_text = clean_newsletter_html(html_content)
+        clean_params = {"cleaner_version": CLEANER_VERSION, "keep_repeated": keep_repeated}
+        if run.is_done("clean", clean_params):
+            clean_text = run.artifact_path("clean").read_text(encoding='utf-8')
+        else:
+            with metrics.stage("clean"):
+                clean_text = cache.cached_text("clean", html_content, {"cleaner_version": CLEANER_VERSION},
+                                               lambda: run_cpu_bound(clean_newsletter_html, html_content, "fast"))
+                
+                # Drop recurring listings and boilerplate that appeared in recent issues. Backfilled
+                # posts are cleaned concurrently and out of order, so they are only recorded.
+                post_id = latest_post.get("guid") or latest_post_url
+                if post is not None:
+                    get_paragraph_index().record_issue(latest_post["feed_url"], post_id, clean_text,
+                                                       latest_post.get("published"))
+                elif not keep_repeated:
+                    clean_text, dropped = get_paragraph_index().remove_repeated(latest_post["feed_url"], post_id, clean_text,
+                                                                                latest_post.get("published"))
+                    if dropped:
+                        print(f"✂️  Dropped {dropped} paragraphs repeated from recent issues")
+                
+                clean_path = run.path("clean.txt")
+                clean_path.write_text(clean_text, encoding='utf-8')
+                record(bytes_in=len(html_content.encode('utf-8')), bytes_out=len(clean_text.encode('utf-8')))
+                run.record_stage("clean", artifact=clean_path, params=clean_params)
         print(f"✅ Newsletter cleaned ({len(clean_text)} characters)")
         
-        # Step 3: Transform to podcast script
-        print("\n🎙️ Step 3: Generating podcast transcript...")
-        podcast_script = transform_newsletter_to_podcast(clean_text)
+        script_params = get_script_cache_params()
+        tts_chunked = chunked_tts or stream_tts
+        if run.is_done("script", script_params):
+            print("\n⏭️  Step 3: Podcast script restored from the run journal")
+            podcast_script = run.artifact_path("script").read_text(encoding='utf-8')
+        elif stream_tts:
+            # Steps 3 and 4 overlap for the main episode: segments go to TTS while the script streams in
+            print("\n🎙️🔊 Steps 3+4: Streaming podcast transcript into audio...")
+            with metrics.stage("script+audio"):
+                podcast_script, audio_path = generate_streaming_episode(cache, clean_text, run.path("episode.wav"))
+                record(bytes_in=len(clean_text.encode('utf-8')), bytes_out=audio_path.stat().st_size)
+            script_path = run.path("script.txt")
+            script_path.write_text(podcast_script, encoding='utf-8')
+            run.record_stage("script", artifact=script_path, params=script_params)
+            run.record_stage("audio", artifact=audio_path, params=get_tts_cache_params(tts_chunked))
+        else:
+            # Step 3: Transform to podcast script
+            print("\n🎙️ Step 3: Generating podcast transcript...")
+            with metrics.stage("script"):
+                podcast_script = cache.cached_text("script", clean_text, script_params,
+                                                   lambda: transform_newsletter_to_podcast(clean_text))
+                record(bytes_in=len(clean_text.encode('utf-8')), bytes_out=len(podcast_script.encode('utf-8')))
+            script_path = run.path("script.txt")
+            script_path.write_text(podcast_script, encoding='utf-8')
+            run.record_stage("script", artifact=script_path, params=script_params)
         print(f"✅ Podcast script generated ({len(podcast_script)} characters)")
         
-        # Step 4: Convert to audio
-        print("\n🔊 Step 4: Converting to audio...")
-        audio_path = text_to_speech(podcast_script)
-        print(f"✅ Audio generated: {audio_path}")
-        
-        # Step 5: Send to Telegram
-        print(f"\n📱 Step 5: Sending to Telegram channel {channel_id}...")
-        bot = TelegramBot()
-        
-        # Create episode title with date
-        today = datetime.now().strftime("%B %d, %Y")
-        episode_title = f"Daily Newsletter Podcast - {today}"
+        # Create episode title with the post's publish date, when the feed gave one
+        published = latest_post.get("published")
+        episode_date = datetime.fromisoformat(published) if published else datetime.now()
+        episode_title = f"Daily Newsletter Podcast - {episode_date.strftime('%B %d, %Y')}"
         
-        # Send the audio file with newsletter link in caption
-        response = bot.send_podcast_episode(channel_id, str(audio_path), episode_title, latest_post_url)
+        # Steps 4 and 5 for the main episode and every variant, all from the same script
+        if len(episode_variants) > 1:
+            print(f"\n🎭 Producing {len(episode_variants)} audio variants concurrently")
+        with ThreadPoolExecutor(max_workers=len(episode_variants)) as executor:
+            produced = list(executor.map(
+                lambda variant: produce_variant(run, metrics, podcast_script, variant, episode_title, latest_post_url,
+                                                tts_chunked, audio_format, audio_bitrate, delivery_turn),
+                episode_variants))
         
-        if response.get('ok'):
-            print("✅ Successfully sent podcast with newsletter link to Telegram!")
-            print(f"Message ID: {response['result']['message_id']}")
-        else:
-            print(f"❌ Telegram error: {response.get('description', 'Unknown error')}")
-        
-        print("\n🎉 Pipeline completed successfully!")
-        print("=" * 50)
+        responses = {target: response for result in produced for target, response in result["responses"].items()}
+        failed = [target for result in produced for target in result["failed"]]
         
-        # Summary
-        print("\n📋 Process summary:")
+        print(f"\n📋 Process summary (run {run.run_id}):")
         print(f"   📰 Newsletter content: {len(html_content)} characters")
         print(f"   📝 Cleaned text: {len(clean_text)} characters")
         print(f"   🎭 Podcast script: {len(podcast_script)} characters")
-        print(f"   🎵 Audio file: {audio_path}")
+        for variant, result in zip(episode_variants, produced):
+            label = f" [{variant['name']}]" if variant["name"] else ""
+            print(f"   🎵 Audio file{label}: {result['upload_path']}" + (f" ({result['duration']}s)" if result['duration'] else ""))
         print(f"   🔗 Newsletter URL: {latest_post_url}")
+        print(f"   ♻️  Stage cache: {cache.summary()}")
+        print(f"   ⏱️  Stage times: {metrics.summary()}")
         
-        # Clean up the temporary audio file after successful upload
-        try:
-            os.remove(audio_path)
-            print(f"   🗑️  Temporary audio file cleaned up")
-        except Exception as cleanup_error:
-            print(f"   ⚠️  Could not clean up audio file: {cleanup_error}")
+        if failed:
+            # The audio stays in the journal so the next run only retries the missing channels
+            run.fail(f"Telegram delivery failed for {', '.join(failed)}")
+            outcome = "partial"
+            print(f"\n⚠️  Delivery incomplete, run {run.run_id} will be resumed ({run.status})")
+        else:
+            # Remember the post (and the feed validators) only once every channel got it
+            seen_posts.mark_processed(latest_post["feed_url"], [latest_post["link"], latest_post["guid"]],
+                                      latest_post["etag"], latest_post["last_modified"])
+            run.finish()
+            outcome = "completed"
+            print("\n🎉 Pipeline completed successfully!")
+            print(f"   🗑️  Run artifacts cleaned up")
+        print("=" * 50)
+        
+        return {
+            "newsletter_url": newsletter_url,
+            "run_id": run.run_id,
+            "post_url": latest_post_url,
+            "skipped": False,
+            "resumed": run.attempts > 1,
+            "published": latest_post.get("published"),
+            "responses": responses,
+        }
         
     except Exception as e:
-        print(f"\n❌ Pipeline failed: {str(e)}")
+        if run is not None:
+            run.fail(str(e))
+            print(f"\n❌ Pipeline failed: {str(e)} (run {run.run_id}: {run.status}, next stage {run.next_stage()})")
+        else:
+            print(f"\n❌ Pipeline failed: {str(e)}")
         raise
+    
+    finally:
+        # Metrics must never fail the run itself
+        try:
+            get_metrics_exporter().export(metrics, outcome)
+        except Exception as e:
+            print(f"⚠️  Could not export metrics: {str(e)}")
 
 
+def load_batch_config(config_path: str) -> dict:
+    """
+    Load and validate a batch configuration file
+    
+    The file is JSON with a list of newsletter -> channel mappings, optional
+    concurrency settings and optional pipeline options (see PIPELINE_OPTIONS), e.g.:
+    
+        {
+            "max_workers": 8,
+            "provider_limits": {"openai": 4, "replicate": 2},
+            "chunked_tts": true,
+            "audio_format": "opus",
+            "newsletters": [
+                {"newsletter_url": "https://example.substack.com", "channel_id": "-1001234567890",
+                 "variants": [{"name": "es", "channel_id": "-1009876543210", "language": "Spanish"}]}
+            ]
+        }
+    
+    'variants' (optional, per newsletter or at the top level for all of them)
+    adds audio variants delivered to their own channels, see normalize_variants.
+    
+    Args:
+        config_path: Path to the JSON configuration file
+    
+    Returns:
+        Parsed configuration dictionary
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    newsletters = config.get('newsletters')
+    if not newsletters:
+        raise ValueError(f"No newsletters configured in {config_path}")
+    
+    for entry in newsletters:
+        if not entry.get('newsletter_url') or not entry.get('channel_id'):
+            raise ValueError(f"Each newsletter needs 'newsletter_url' and 'channel_id': {entry}")
+        normalize_variants(entry.get('variants', config.get('variants')))
+    
+    return config
+
+
+def newsletter_options(entry: dict, options: dict) -> dict:
+    """Pipeline options for one newsletter of a batch, with its own variants if it configures any"""
+    return {**options, "variants": entry['variants']} if 'variants' in entry else options
+
+
+def run_batch_pipeline(config_path: str, **options) -> list[dict]:
+    """
+    Run the pipeline for every configured newsletter concurrently
+    
+    Each newsletter runs on its own worker thread, while calls to each external
+    provider are capped by the configured provider limits. A failing newsletter
+    does not stop the others.
+    
+    Args:
+        config_path: Path to the JSON batch configuration file
+        options: Pipeline options overriding those in the configuration file
+    
+    Returns:
+        List of per-newsletter results with an 'ok' flag and either the
+        pipeline summary or the error message
+    """
+    config = load_batch_config(config_path)
+    newsletters = config['newsletters']
+    configure_provider_limits(config.get('provider_limits', {}))
+    max_workers = int(config.get('max_workers', len(newsletters)))
+    options = {**{key: config[key] for key in PIPELINE_OPTIONS if key in config}, **options}
+    
+    print(f"🗂️  Running batch of {len(newsletters)} newsletters ({max_workers} workers)")
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_newsletter_to_podcast_pipeline, entry['newsletter_url'], entry['channel_id'],
+                            **newsletter_options(entry, options)): entry
+            for entry in newsletters
+        }
+        
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                results.append({"ok": True, "newsletter_url": entry['newsletter_url'], "summary": future.result()})
+            except Exception as e:
+                results.append({"ok": False, "newsletter_url": entry['newsletter_url'], "error": str(e)})
+    
+    print("\n📋 Batch summary:")
+    for result in results:
+        status = "✅" if result['ok'] else f"❌ {result['error']}"
+        print(f"   {result['newsletter_url']}: {status}")
+    
+    return results
+
+
+def run_backfill(newsletter_url: str, channel_id: Union[str, list[str]], limit: Optional[int] = None,
+                 since: Optional[date] = None, until: Optional[date] = None,
+                 max_workers: int = BACKFILL_WORKERS, **options) -> list[dict]:
+    """
+    Turn a newsletter's past posts into episodes, e.g. to seed a new channel
+    
+    The last limit posts (and/or those published between since and until) are
+    processed concurrently on max_workers threads, with calls to each provider
+    capped by the provider limits, and delivered in publish order. Posts that
+    were already delivered are skipped and interrupted ones continue from
+    their run journal, so an interrupted backfill is resumed by running it again.
+    
+    Args:
+        newsletter_url: Substack newsletter URL
+        channel_id: Telegram channel ID, or a list of channel IDs
+        limit: Optional number of most recent posts
+        since: Optional first publish date (inclusive)
+        until: Optional last publish date (inclusive)
+        max_workers: Posts processed concurrently
+        options: Pipeline options (see PIPELINE_OPTIONS)
+    
+    Returns:
+        List of per-post results in publish order, with an 'ok' flag and either
+        the pipeline summary or the error message
+    """
+    print(f"🗄️  Listing past posts of {newsletter_url}...")
+    with provider_slot("substack"):
+        posts = list_posts(newsletter_url, limit, since, until)
+    
+    seen_posts = get_seen_post_store()
+    if not options.get("force"):
+        posts = [post for post in posts if not seen_posts.is_processed(post["feed_url"], post["link"], post["guid"])]
+    print(f"🗄️  Backfilling {len(posts)} posts ({max_workers} workers)")
+    
+    order = PublishOrder()
+    
+    def process(position: int, post: dict) -> dict:
+        try:
+            return run_newsletter_to_podcast_pipeline(newsletter_url, channel_id, post=post,
+                                                      delivery_turn=lambda: order.wait_turn(position), **options)
+        finally:
+            # A failed post does not hold back the later ones; it is retried by the next backfill
+            order.finish(position)
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(process, position, post) for position, post in enumerate(posts)]
+        results = []
+        for post, future in zip(posts, futures):
+            try:
+                results.append({"ok": True, "post_url": post["link"], "summary": future.result()})
+            except Exception as e:
+                results.append({"ok": False, "post_url": post["link"], "error": str(e)})
+    
+    print("\n📋 Backfill summary:")
+    for post, result in zip(posts, results):
+        status = "✅" if result['ok'] else f"❌ {result['error']}"
+        print(f"   {post['published'][:10]}  {post['link']}: {status}")
+    
+    return results
+
+
+def check_for_new_posts(newsletters: list[dict]) -> list[dict]:
+    """
+    Check which newsletters have work to do, without running the pipeline
+    
+    Only the feeds are requested (conditionally, like a pipeline run), and no
+    AI or TTS SDK is imported. When running in GitHub Actions, the result is
+    also written to the step output 'new_posts' ('true' or 'false').
+    
+    Args:
+        newsletters: Newsletter -> channel mappings (see load_batch_config)
+    
+    Returns:
+        List of the newsletters with work, each with 'newsletter_url',
+        'post_url' and 'run_id' (set when an interrupted run will be resumed)
+    """
+    seen_posts = get_seen_post_store()
+    journal = get_run_journal()
+    
+    def check(entry: dict) -> Optional[dict]:
+        url = entry['newsletter_url']
+        run = journal.find_resumable(url)
+        if run is not None:
+            return {"newsletter_url": url, "post_url": run.post["link"], "run_id": run.run_id}
+        
+        with provider_slot("substack"):
+            latest_post = get_latest_post(url, seen_posts)
+        if latest_post is None:
+            return None
+        return {"newsletter_url": url, "post_url": latest_post["link"], "run_id": None}
+    
+    with ThreadPoolExecutor(max_workers=len(newsletters)) as executor:
+        pending = [result for result in executor.map(check, newsletters) if result is not None]
+    
+    print("\n🔎 Check summary:")
+    for entry in newsletters:
+        match = next((result for result in pending if result['newsletter_url'] == entry['newsletter_url']), None)
+        if match is None:
+            status = "nothing new"
+        elif match['run_id']:
+            status = f"run {match['run_id']} will be resumed ({match['post_url']})"
+        else:
+            status = f"new post {match['post_url']}"
+        print(f"   {entry['newsletter_url']}: {status}")
+    
+    github_output = os.getenv('GITHUB_OUTPUT')
+    if github_output:
+        with open(github_output, 'a', encoding='utf-8') as f:
+            f.write(f"new_posts={'true' if pending else 'false'}\n")
+    
+    return pending
+
+
+def run_daemon(config: dict, **options) -> None:
+    """
+    Keep polling newsletters and run the pipeline as soon as a new post appears
+    
+    Every newsletter is polled right away, then on its own adaptive interval
+    (see PollScheduler): quiet feeds back off, and polling tightens around the
+    times a feed usually publishes. A poll is a full pipeline run, so a new
+    post is processed immediately; HTTP sessions and API clients stay warm
+    between polls. Stops gracefully on SIGTERM or Ctrl+C after the running
+    pipelines finish.
+    
+    Args:
+        config: Batch configuration (see load_batch_config)
+        options: Pipeline options overriding those in the configuration
+    """
+    newsletters = config['newsletters']
+    configure_provider_limits(config.get('provider_limits', {}))
+    max_workers = int(config.get('max_workers', len(newsletters)))
+    options = {**{key: config[key] for key in PIPELINE_OPTIONS if key in config}, **options}
+    scheduler = PollScheduler()
+    
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    
+    print(f"😈 Daemon polling {len(newsletters)} newsletters ({max_workers} workers)")
+    
+    # Monotonic time at which each newsletter is polled next (None while running)
+    due = {entry['newsletter_url']: time.monotonic() for entry in newsletters}
+    running = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while not stop.is_set():
+                for entry in newsletters:
+                    url = entry['newsletter_url']
+                    if due[url] is not None and due[url] <= time.monotonic():
+                        running[executor.submit(run_newsletter_to_podcast_pipeline, url, entry['channel_id'],
+                                                **newsletter_options(entry, options))] = entry
+                        due[url] = None
+                
+                upcoming = [when for when in due.values() if when is not None]
+                timeout = min([DAEMON_TICK_SECONDS] + [max(0, when - time.monotonic()) for when in upcoming])
+                if not running:
+                    stop.wait(timeout)
+                    continue
+                
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = running.pop(future)['newsletter_url']
+                    # Only a freshly found post says when the feed publishes; resumed runs do not
+                    published = None
+                    try:
+                        summary = future.result()
+                        new_post = not summary['skipped'] and not summary['resumed']
+                        if new_post and summary['published']:
+                            published = datetime.fromisoformat(summary['published'])
+                    except Exception as e:
+                        print(f"❌ {url}: {e}")
+                        new_post = False
+                    
+                    scheduler.record_poll(url, new_post, published=published)
+                    delay = scheduler.next_delay(url)
+                    due[url] = time.monotonic() + delay
+                    print(f"⏰ Next poll of {url} in {delay / 60:.1f} min")
+        except KeyboardInterrupt:
+            stop.set()
+        
+        print("🛑 Stopping daemon, waiting for running pipelines to finish...")
+    close_clients()
+    print("🛑 Daemon stopped")
+
+
+def print_runs(run_id: Optional[str] = None) -> None:
+    """
+    Print the run journal: one line per run, or every stage checkpoint of one run
+    
+    Args:
+        run_id: Optional run to show in detail
+    """
+    journal = get_run_journal()
+    
+    if run_id is None:
+        runs = journal.list_runs()
+        if not runs:
+            print("No runs recorded")
+        for run in runs:
+            print(f"{run.run_id}  {run.status:<9}  attempts={run.attempts}  next={run.next_stage() or '-'}  "
+                  f"{run.data['updated_at']}  {run.post['link']}")
+        return
+    
+    run = journal.load(run_id)
+    print(f"Run {run.run_id}: {run.status} after {run.attempts} attempt(s)")
+    print(f"   Newsletter: {run.data['newsletter_url']}")
+    print(f"   Post: {run.post['link']}")
+    print(f"   Channels: {', '.join(map(str, run.data['channels']))}")
+    if run.data["error"]:
+        print(f"   Error: {run.data['error']}")
+    # Main episode stages, then the stages journaled for audio variants
+    for stage in list(RUN_STAGES) + [key for key in run.data["stages"] if key not in RUN_STAGES]:
+        record = run.stage(stage)
+        artifact = f"  {run.artifact_path(stage)}" if record.get("artifact") else ""
+        print(f"   {stage:<12} {record.get('status', 'pending'):<8} {record.get('finished_at', '')}{artifact}")
+
 
 if __name__ == "__main__":
     # Configuration
@@ -99,7 +780,87 @@ if __name__ == "__main__":
     # Telegram channel ID
     CHANNEL_ID = "-1003291063219"
     
+    parser = argparse.ArgumentParser(description="Newsletter to Podcast Automation")
+    parser.add_argument('--config', help="JSON file with newsletter -> channel mappings for a batch run")
+    parser.add_argument('--force', action='store_true', help="Process the latest post even if it was already delivered")
+    parser.add_argument('--chunked-tts', action='store_true', help="Synthesize audio in parallel chunks")
+    parser.add_argument('--stream-tts', action='store_true', help="Send script segments to TTS while the LLM is still generating")
+    parser.add_argument('--audio-format', choices=["mp3", "opus", "wav"], help="Upload format (default mp3; wav skips encoding)")
+    parser.add_argument('--audio-bitrate', help="Encoder bitrate, e.g. 48k")
+    parser.add_argument('--keep-repeated', action='store_true', help="Keep paragraphs repeated from recent issues")
+    parser.add_argument('--variants', metavar='FILE', help="JSON file with a list of audio variants (voice, language, channel)")
+    parser.add_argument('--runs', action='store_true', help="List journaled runs and exit")
+    parser.add_argument('--show-run', metavar='RUN_ID', help="Show the stage checkpoints of a run and exit")
+    parser.add_argument('--resume', metavar='RUN_ID', help="Resume a journaled run at its first incomplete stage")
+    parser.add_argument('--daemon', action='store_true', help="Keep running and poll the newsletter(s) on adaptive intervals")
+    parser.add_argument('--check-only', action='store_true', help="Only check the newsletter(s) for a new post and exit")
+    parser.add_argument('--cpu-workers', type=int, metavar='N',
+                        help="Worker processes for CPU-bound stages (default PODCAST_CPU_WORKERS or 0: in-process)")
+    parser.add_argument('--backfill', type=int, nargs='?', const=0, metavar='N',
+                        help="Process the last N posts (all posts in --since/--until without N) in publish order")
+    parser.add_argument('--since', type=date.fromisoformat, metavar='YYYY-MM-DD', help="First publish date to backfill")
+    parser.add_argument('--until', type=date.fromisoformat, metavar='YYYY-MM-DD', help="Last publish date to backfill")
+    args = parser.parse_args()
+    if (args.since or args.until) and args.backfill is None:
+        parser.error("--since and --until require --backfill")
+    if args.backfill == 0 and not args.since:
+        parser.error("--backfill needs a number of posts or --since")
+    
+    if args.runs or args.show_run:
+        print_runs(args.show_run)
+        sys.exit(0)
+    
+    # Only options given on the command line override the defaults / batch configuration
+    options = {key: value for key, value in vars(args).items() if key in PIPELINE_OPTIONS and value not in (None, False)}
+    if args.variants:
+        with open(args.variants, 'r', encoding='utf-8') as f:
+            options['variants'] = json.load(f)
+    
+    if args.cpu_workers is not None:
+        configure_cpu_workers(args.cpu_workers)
+    
     print("Newsletter to Podcast Automation")
     print("================================")
     
-    run_newsletter_to_podcast_pipeline(NEWSLETTER_URL, CHANNEL_ID)
\ No newline at end of file
+    try:
+        if args.resume:
+            # The run's own channels and options apply, command line options override them
+            run = get_run_journal().load(args.resume)
+            if not run.is_done("fetch"):
+                # Completed runs have their artifacts deleted; runs that failed while fetching have none
+                print(f"❌ Run {args.resume} cannot be resumed ({run.status}): it has no fetched post to continue from")
+                sys.exit(1)
+            run_options = {**{key: value for key, value in run.data["options"].items() if key in PIPELINE_OPTIONS}, **options}
+            run_newsletter_to_podcast_pipeline(run.data["newsletter_url"], run.data["channels"],
+                                               resume_run_id=args.resume, **run_options)
+        elif args.backfill is not None:
+            # Newsletters of a batch configuration are backfilled one after the other
+            config = load_batch_config(args.config) if args.config else {
+                "newsletters": [{"newsletter_url": NEWSLETTER_URL, "channel_id": CHANNEL_ID}]
+            }
+            configure_provider_limits(config.get('provider_limits', {}))
+            options = {**{key: config[key] for key in PIPELINE_OPTIONS if key in config}, **options}
+            backfill_results = []
+            for entry in config['newsletters']:
+                backfill_results += run_backfill(entry['newsletter_url'], entry['channel_id'], args.backfill or None,
+                                                 args.since, args.until, int(config.get('max_workers', BACKFILL_WORKERS)),
+                                                 **newsletter_options(entry, options))
+            if not all(result['ok'] for result in backfill_results):
+                sys.exit(1)
+        elif args.check_only or args.daemon:
+            config = load_batch_config(args.config) if args.config else {
+                "newsletters": [{"newsletter_url": NEWSLETTER_URL, "channel_id": CHANNEL_ID}]
+            }
+            if args.check_only:
+                check_for_new_posts(config['newsletters'])
+            else:
+                run_daemon(config, **options)
+        elif args.config:
+            batch_results = run_batch_pipeline(args.config, **options)
+            if not all(result['ok'] for result in batch_results):
+                sys.exit(1)
+        else:
+            run_newsletter_to_podcast_pipeline(NEWSLETTER_URL, CHANNEL_ID, **options)
+    finally:
+        # Release pooled connections and the OpenAI client, also after errors and sys.exit
+        close_clients()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+# Worker processes for CPU-bound stages (HTML cleaning); 0 runs them in the
+# calling thread. Batch runs share the pool across every newsletter.
+CPU_WORKERS = int(os.getenv('PODCAST_CPU_WORKERS', '0'))
+
+_workers = CPU_WORKERS
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def configure_cpu_workers(workers: int) -> None:
+    """
+    Set the number of worker processes for CPU-bound stages
+    
+    Must be called before any work is scheduled; a pool that was already
+    started keeps its size.
+    
+    Args:
+        workers: Number of processes, 0 to run CPU-bound stages in-process
+    """
+    global _workers
+    if int(workers) < 0:
+        raise ValueError("CPU workers must be 0 (in-process) or more")
+    with _lock:
+        _workers = int(workers)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    with _lock:
+        if _pool is None and _workers > 0:
+            # Spawned, not forked: forking a process with running I/O threads can copy held locks
+            _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def run_cpu_bound(function: Callable, *args):
+    """
+    Run a CPU-bound function on the process pool, or in this thread when no pool is configured
+    
+    Arguments and result are pickled across the process boundary, so pass
+    text or file paths rather than large buffers. The calling thread blocks
+    until the result is ready, which keeps the pool behind the I/O concurrency
+    of the pipeline threads.
+    
+    Args:
+        function: Module-level function, importable by the worker processes
+        args: Positional arguments
+    
+    Returns:
+        The function's return value
+    """
+    pool = _get_pool()
+    if pool is None:
+        return function(*args)
+    return pool.submit(function, *args).result()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pipeline.provider_limits import get_provider_limit
+
+
+# (connect, read) timeouts in seconds applied to every request that does not set its own
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Completions can take minutes; the connect timeout still catches dead endpoints
+OPENAI_READ_TIMEOUT = 180
+
+# Number of distinct hosts whose connection pools are kept per session
+POOL_HOSTS = 10
+
+# Extra pooled connections per host on top of the provider's concurrency limit,
+# for hedged feed requests that outlive their slot
+POOL_HEADROOM = 4
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        """
+        HTTPAdapter that applies a default timeout to requests sent without one
+        
+        Args:
+            timeout: Default (connect, read) timeout in seconds
+        """
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+_sessions: dict[str, requests.Session] = {}
+_openai_client = None
+_lock = threading.Lock()
+
+
+def _create_session(provider: str) -> requests.Session:
+    # One keep-alive pool per host, sized to the provider's concurrency limit.
+    # Concurrency itself is capped by provider_slot, so the pool never blocks.
+    adapter = TimeoutHTTPAdapter(pool_connections=POOL_HOSTS,
+                                 pool_maxsize=get_provider_limit(provider) + POOL_HEADROOM)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(provider: str) -> requests.Session:
+    """
+    Process-wide HTTP session for a provider, reusing connections across requests and runs
+    
+    Args:
+        provider: Provider name (e.g., 'substack', 'telegram', 'replicate')
+    
+    Returns:
+        Shared requests Session with pooled keep-alive connections and default timeouts
+    """
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = _create_session(provider)
+            _sessions[provider] = session
+        return session
+
+
+def get_openai_client():
+    """
+    Process-wide OpenAI client, so every completion reuses the same connection pool
+    
+    Returns:
+        Shared OpenAI client configured from the OPENAI_API_KEY environment variable
+    """
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            import httpx
+            from openai import OpenAI
+            
+            # Get OpenAI API key from environment
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment variables")
+            
+            _openai_client = OpenAI(api_key=api_key, max_retries=2,
+                                   timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=CONNECT_TIMEOUT))
+        return _openai_client
+
+
+def close_clients() -> None:
+    """Close every shared session and client, e.g. before the process exits"""
+    global _openai_client
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        if _openai_client is not None:
+            _openai_client.close()
+            _openai_client = None
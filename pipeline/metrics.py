@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from pipeline.state_dir import get_state_dir
+
+
+# Counters recorded by the stages, with their Prometheus help text. Counters not
+# listed here are still exported, with a generic description.
+COUNTERS = {
+    "bytes_in": "Bytes read by the stage (post HTML, text, audio)",
+    "bytes_out": "Bytes produced or uploaded by the stage",
+    "llm_requests": "Chat completion requests",
+    "prompt_tokens": "Prompt tokens reported by the OpenAI API",
+    "completion_tokens": "Completion tokens reported by the OpenAI API",
+    "tts_requests": "Text-to-speech requests",
+    "tts_characters": "Characters sent to text-to-speech",
+    "retries": "Retried requests (TTS chunks, Telegram rate limits)",
+    "cache_hits": "Stage cache hits",
+    "cache_misses": "Stage cache misses",
+}
+
+# The JSON lines file is rotated to '<name>.1' once it grows beyond this size
+MAX_JSONL_BYTES = 10 * 1024 * 1024
+
+# Stage currently recording in this thread or context (see propagate)
+_current_stage: contextvars.ContextVar[Optional["StageMetrics"]] = contextvars.ContextVar(
+    "current_stage", default=None)
+
+
+class StageMetrics:
+    def __init__(self, name: str):
+        """
+        Wall time, status and counters of one pipeline stage
+        
+        Args:
+            name: Stage name (e.g., 'fetch', 'script')
+        """
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.seconds = 0.0
+        self.status = "ok"
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, **counters: int) -> None:
+        """
+        Increment counters; safe to call from worker threads
+        
+        Args:
+            counters: Counter name -> amount
+        """
+        with self._lock:
+            for name, amount in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+
+class RunMetrics:
+    def __init__(self, newsletter_url: str):
+        """
+        Stage measurements of one pipeline run
+        
+        Args:
+            newsletter_url: Newsletter URL, used as the 'newsletter' label
+        """
+        self.newsletter_url = newsletter_url
+        self.run_id: Optional[str] = None
+        self.post_url: Optional[str] = None
+        self.stages: list[StageMetrics] = []
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """
+        Time a stage; record() calls inside the block (and in functions wrapped
+        with propagate) are added to it. An exception marks the stage as failed.
+        
+        Args:
+            name: Stage name
+        
+        Returns:
+            Context manager yielding the StageMetrics
+        """
+        stage = StageMetrics(name)
+        self.stages.append(stage)
+        token = _current_stage.set(stage)
+        started = time.perf_counter()
+        try:
+            yield stage
+        except BaseException:
+            stage.status = "error"
+            raise
+        finally:
+            stage.seconds = time.perf_counter() - started
+            _current_stage.reset(token)
+    
+    def records(self) -> list[dict]:
+        """
+        One JSON-serializable record per stage
+        
+        Returns:
+            List of stage records in execution order
+        """
+        return [{
+            "run_id": self.run_id,
+            "newsletter_url": self.newsletter_url,
+            "post_url": self.post_url,
+            "stage": stage.name,
+            "status": stage.status,
+            "started_at": stage.started_at,
+            "seconds": round(stage.seconds, 3),
+            **stage.counters,
+        } for stage in self.stages]
+    
+    def summary(self) -> str:
+        """Human readable wall time per stage"""
+        return ", ".join(f"{stage.name} {stage.seconds:.1f}s" for stage in self.stages)
+
+
+def record(**counters: int) -> None:
+    """
+    Add to the counters of the stage being measured; does nothing outside a stage
+    
+    Args:
+        counters: Counter name -> amount (e.g., prompt_tokens=1200)
+    """
+    stage = _current_stage.get()
+    if stage is not None:
+        stage.add(**counters)
+
+
+def propagate(function: Callable) -> Callable:
+    """
+    Wrap a function handed to a thread pool so its record() calls count towards
+    the caller's current stage (worker threads do not inherit it)
+    
+    Args:
+        function: Function to run in another thread
+    
+    Returns:
+        Wrapped function
+    """
+    stage = _current_stage.get()
+    
+    @wraps(function)
+    def run(*args, **kwargs):
+        token = _current_stage.set(stage)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_stage.reset(token)
+    return run
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsExporter:
+    def __init__(self, metrics_dir: Optional[Path] = None, textfile_path: Optional[Path] = None):
+        """
+        Export stage metrics as JSON lines and as a Prometheus textfile
+        
+        Every stage of every run is appended to stages.jsonl. Totals per
+        newsletter and stage are kept in totals.json and rendered as counters
+        into the textfile, for node_exporter's textfile collector.
+        
+        Args:
+            metrics_dir: Optional directory, defaults to PODCAST_METRICS_DIR or 'metrics' in the state directory
+            textfile_path: Optional Prometheus textfile, defaults to PODCAST_PROMETHEUS_TEXTFILE
+                or podcast.prom in the metrics directory
+        """
+        metrics_dir = metrics_dir or os.getenv('PODCAST_METRICS_DIR')
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else get_state_dir() / 'metrics'
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.metrics_dir / 'stages.jsonl'
+        self.totals_path = self.metrics_dir / 'totals.json'
+        textfile_path = textfile_path or os.getenv('PODCAST_PROMETHEUS_TEXTFILE')
+        self.textfile_path = Path(textfile_path) if textfile_path else self.metrics_dir / 'podcast.prom'
+        self._lock = threading.Lock()
+        self._totals = {"stages": {}, "runs": {}}
+        
+        if self.totals_path.exists():
+            try:
+                self._totals = json.loads(self.totals_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable metrics totals {self.totals_path}: {e}")
+    
+    @staticmethod
+    def _write_atomic(path: Path, text: str) -> None:
+        # Write to a temporary file first so readers (and scrapers) never see a partial file
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, path)
+    
+    def export(self, metrics: RunMetrics, status: str) -> None:
+        """
+        Append a run's stage records and refresh the totals and the textfile
+        
+        Args:
+            metrics: Measurements of the run
+            status: Outcome of the run ('completed', 'skipped', 'failed', ...)
+        """
+        records = metrics.records()
+        with self._lock:
+            if self.jsonl_path.exists() and self.jsonl_path.stat().st_size > MAX_JSONL_BYTES:
+                os.replace(self.jsonl_path, self.jsonl_path.with_name(self.jsonl_path.name + '.1'))
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                for entry in records:
+                    f.write(json.dumps(entry) + '\n')
+            
+            for stage in metrics.stages:
+                key = f"{metrics.newsletter_url}\n{stage.name}"
+                totals = self._totals["stages"].setdefault(key, {"runs": {}, "seconds": 0.0, "counters": {}})
+                totals["runs"][stage.status] = totals["runs"].get(stage.status, 0) + 1
+                totals["seconds"] += stage.seconds
+                totals["last_seconds"] = stage.seconds
+                for name, amount in stage.counters.items():
+                    totals["counters"][name] = totals["counters"].get(name, 0) + amount
+            
+            key = f"{metrics.newsletter_url}\n{status}"
+            runs = self._totals["runs"].setdefault(key, {"count": 0})
+            runs["count"] += 1
+            runs["last_timestamp"] = time.time()
+            
+            self._write_atomic(self.totals_path, json.dumps(self._totals, indent=2))
+            self._write_atomic(self.textfile_path, self.render())
+    
+    def render(self) -> str:
+        """
+        Totals in the Prometheus text exposition format
+        
+        Returns:
+            Textfile content
+        """
+        families = {}
+        
+        def sample(name: str, kind: str, help_text: str, labels: dict, value: float) -> None:
+            family = families.setdefault(name, (kind, help_text, []))
+            label_text = ",".join(f'{label}="{_escape_label(text)}"' for label, text in labels.items())
+            family[2].append(f"{name}{{{label_text}}} {value:g}")
+        
+        for key, totals in sorted(self._totals["stages"].items()):
+            newsletter, stage = key.split('\n')
+            labels = {"newsletter": newsletter, "stage": stage}
+            for status, count in sorted(totals["runs"].items()):
+                sample("podcast_stage_runs_total", "counter", "Stage executions by status",
+                       {**labels, "status": status}, count)
+            sample("podcast_stage_seconds_total", "counter", "Wall time spent in the stage",
+                   labels, totals["seconds"])
+            sample("podcast_stage_last_seconds", "gauge", "Wall time of the stage's latest execution",
+                   labels, totals.get("last_seconds", 0))
+            for name, amount in sorted(totals["counters"].items()):
+                sample(f"podcast_stage_{name}_total", "counter", COUNTERS.get(name, f"Stage counter {name}"),
+                       labels, amount)
+        
+        for key, runs in sorted(self._totals["runs"].items()):
+            newsletter, status = key.split('\n')
+            labels = {"newsletter": newsletter, "status": status}
+            sample("podcast_runs_total", "counter", "Pipeline runs by outcome", labels, runs["count"])
+            sample("podcast_last_run_timestamp_seconds", "gauge", "Unix time of the latest run with this outcome",
+                   labels, runs["last_timestamp"])
+        
+        lines = []
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+_shared_exporter = None
+_shared_exporter_lock = threading.Lock()
+
+
+def get_metrics_exporter() -> MetricsExporter:
+    """
+    Process-wide metrics exporter, shared by concurrent pipeline runs
+    
+    Returns:
+        Shared MetricsExporter
+    """
+    global _shared_exporter
+    with _shared_exporter_lock:
+        if _shared_exporter is None:
+            _shared_exporter = MetricsExporter()
+        return _shared_exporter
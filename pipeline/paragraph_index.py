@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from pipeline.state_dir import get_state_dir
+
+
+# Number of recent issues per feed whose paragraphs count as "already seen"
+RECENT_ISSUES = int(os.getenv('PODCAST_DEDUP_ISSUES', '6'))
+
+# Shorter paragraphs (headings, dates, "Events") are never dropped
+MIN_PARAGRAPH_CHARS = 40
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def fingerprint_paragraph(paragraph: str) -> str:
+    """
+    Stable fingerprint of a paragraph that ignores case, punctuation and spacing
+    
+    Args:
+        paragraph: Paragraph text
+    
+    Returns:
+        Hex fingerprint
+    """
+    normalized = _NON_WORD.sub(' ', paragraph.lower()).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+class ParagraphIndex:
+    def __init__(self, index_path: Optional[Path] = None):
+        """
+        Persistent fingerprints of the paragraphs in each feed's recent issues
+        
+        Layout of the JSON file:
+        
+            {"feeds": {"<feed url>": {"issues": [{"post": "<post id>", "published": "<iso time>",
+                                                  "fingerprints": [...]}]}}}
+        
+        Issues are kept in publish order, so the index holds the most recently
+        published issues however the posts were processed (e.g., a backfill).
+        
+        Args:
+            index_path: Optional JSON file path, defaults to paragraphs.json in the state directory
+        """
+        self.index_path = Path(index_path) if index_path else get_state_dir() / 'paragraphs.json'
+        self._lock = threading.Lock()
+        self._data = {"feeds": {}}
+        
+        if self.index_path.exists():
+            try:
+                self._data = json.loads(self.index_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable paragraph index {self.index_path}: {e}")
+    
+    def _save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a truncated index
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._data), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+    
+    def _record_issue(self, feed_url: str, post_id: str, fingerprints: list[str],
+                      published: Optional[str]) -> list[dict]:
+        """Add an issue, keeping the RECENT_ISSUES last published; returns the other issues published before it"""
+        feed = self._data["feeds"].setdefault(feed_url, {"issues": []})
+        issues = [issue for issue in feed["issues"] if issue["post"] != post_id]
+        earlier = [issue for issue in issues if _published_before(issue.get("published"), published)]
+        
+        issues.append({"post": post_id, "published": published, "fingerprints": sorted(set(fingerprints))})
+        # Stable sort: issues recorded without a publish time stay first, in the order they were recorded
+        issues.sort(key=lambda issue: _publish_time(issue.get("published")) or datetime.min)
+        feed["issues"] = issues[-RECENT_ISSUES:]
+        self._save()
+        return earlier
+    
+    def remove_repeated(self, feed_url: str, post_id: str, text: str,
+                        published: Optional[str] = None) -> tuple[str, int]:
+        """
+        Drop paragraphs already seen in the feed's recent issues and record this issue
+        
+        Only issues published before this one are compared, and the issue
+        itself is excluded, so re-running a post (e.g. after a failed upload)
+        gives the same result. If every paragraph was seen before the text is
+        returned unchanged.
+        
+        Args:
+            feed_url: Feed URL the post belongs to
+            post_id: Identifier of the post (GUID or URL)
+            text: Cleaned newsletter text (paragraphs separated by blank lines)
+            published: Publish time of the post (ISO 8601), if known
+        
+        Returns:
+            Tuple of (text without repeated paragraphs, number of dropped paragraphs)
+        """
+        paragraphs = [p for p in text.split('\n\n') if p.strip()]
+        fingerprints = [fingerprint_paragraph(p) for p in paragraphs]
+        
+        with self._lock:
+            earlier = self._record_issue(feed_url, post_id, fingerprints, published)
+            seen = {fp for issue in earlier for fp in issue["fingerprints"]}
+        
+        kept = [p for p, fp in zip(paragraphs, fingerprints)
+                if len(p) < MIN_PARAGRAPH_CHARS or fp not in seen]
+        
+        if not any(len(p) >= MIN_PARAGRAPH_CHARS for p in kept):
+            return text, 0
+        return '\n\n'.join(kept), len(paragraphs) - len(kept)
+    
+    def record_issue(self, feed_url: str, post_id: str, text: str, published: Optional[str] = None) -> None:
+        """
+        Record an issue's paragraphs without removing any from it
+        
+        Used for backfilled posts: they are cleaned concurrently and out of
+        order, so comparing them with whatever was recorded first would depend
+        on timing. Later issues are still compared with them.
+        
+        Args:
+            feed_url: Feed URL the post belongs to
+            post_id: Identifier of the post (GUID or URL)
+            text: Cleaned newsletter text (paragraphs separated by blank lines)
+            published: Publish time of the post (ISO 8601), if known
+        """
+        fingerprints = [fingerprint_paragraph(p) for p in text.split('\n\n') if p.strip()]
+        with self._lock:
+            self._record_issue(feed_url, post_id, fingerprints, published)
+
+
+def _publish_time(published: Optional[str]) -> Optional[datetime]:
+    # Naive UTC, so times with different offsets compare correctly
+    if not published:
+        return None
+    moment = datetime.fromisoformat(published)
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def _published_before(issue_published: Optional[str], published: Optional[str]) -> bool:
+    # Issues or posts without a publish time are compared as before, by recording order
+    issue_time, post_time = _publish_time(issue_published), _publish_time(published)
+    if issue_time is None or post_time is None:
+        return True
+    return issue_time < post_time
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_paragraph_index() -> ParagraphIndex:
+    """
+    Process-wide index instance, so concurrent pipeline runs never overwrite each other's updates
+    
+    Returns:
+        Shared ParagraphIndex
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = ParagraphIndex()
+        return _shared_index
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from pipeline.state_dir import get_state_dir
+
+
+# Poll interval bounds in seconds; quiet feeds back off from the minimum to the maximum
+MIN_POLL_SECONDS = int(os.getenv('PODCAST_MIN_POLL_SECONDS', '300'))
+MAX_POLL_SECONDS = int(os.getenv('PODCAST_MAX_POLL_SECONDS', str(6 * 3600)))
+BACKOFF_FACTOR = 1.5
+
+# Random +/- fraction applied to every delay so feeds do not poll in lockstep
+JITTER = 0.1
+
+# Within this many minutes of a usual publish time, feeds are polled at the minimum interval
+PUBLISH_WINDOW_MINUTES = 60
+
+# Publish times (from the feed, else the detecting poll) remembered per feed
+MAX_PUBLISH_TIMES = 20
+
+# With fewer publish times than this, only the time of day is matched (not the weekday)
+MIN_WEEKLY_HISTORY = 3
+
+
+class PollScheduler:
+    def __init__(self, schedule_path: Optional[Path] = None):
+        """
+        Adaptive poll intervals per feed, persisted across restarts
+        
+        Every poll without a new post multiplies the feed's interval by
+        BACKOFF_FACTOR (up to MAX_POLL_SECONDS); a new post resets it to
+        MIN_POLL_SECONDS. Around the weekdays and times at which the feed
+        usually publishes, the minimum interval is used regardless.
+        
+        Layout of the JSON file:
+        
+            {"feeds": {"<newsletter url>": {"interval": 300, "published": ["<iso time>", ...]}}}
+        
+        Args:
+            schedule_path: Optional JSON file path, defaults to schedule.json in the state directory
+        """
+        self.schedule_path = Path(schedule_path) if schedule_path else get_state_dir() / 'schedule.json'
+        self._lock = threading.Lock()
+        self._data = {"feeds": {}}
+        
+        if self.schedule_path.exists():
+            try:
+                self._data = json.loads(self.schedule_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable poll schedule {self.schedule_path}: {e}")
+    
+    def _feed(self, feed_key: str) -> dict:
+        return self._data["feeds"].setdefault(feed_key, {"interval": MIN_POLL_SECONDS, "published": []})
+    
+    def _save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a truncated schedule
+        tmp_path = self.schedule_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._data, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.schedule_path)
+    
+    def record_poll(self, feed_key: str, new_post: bool, now: Optional[datetime] = None,
+                    published: Optional[datetime] = None) -> None:
+        """
+        Update a feed's interval after a poll
+        
+        Args:
+            feed_key: Feed identifier (the newsletter URL)
+            new_post: Whether the poll found (and processed) a new post
+            now: Time of the poll, defaults to the current local time
+            published: Publish time of the new post from the feed; the poll time
+                       is remembered instead when the feed gave none
+        """
+        now = now or datetime.now()
+        if published is not None and published.tzinfo is not None:
+            # Publish windows are matched in local time
+            published = published.astimezone().replace(tzinfo=None)
+        with self._lock:
+            feed = self._feed(feed_key)
+            if new_post:
+                feed["interval"] = MIN_POLL_SECONDS
+                publish_time = (published or now).isoformat(timespec='minutes')
+                feed["published"] = (feed["published"] + [publish_time])[-MAX_PUBLISH_TIMES:]
+            else:
+                feed["interval"] = min(MAX_POLL_SECONDS, feed["interval"] * BACKOFF_FACTOR)
+            self._save()
+    
+    def _near_publish_time(self, feed: dict, moment: datetime) -> bool:
+        published = [datetime.fromisoformat(value) for value in feed["published"]]
+        match_weekday = len(published) >= MIN_WEEKLY_HISTORY
+        
+        for past in published:
+            # Same time of day on the moment's date and its neighbours (windows may cross midnight)
+            same_time = moment.replace(hour=past.hour, minute=past.minute, second=0, microsecond=0)
+            for days in (-1, 0, 1):
+                candidate = same_time + timedelta(days=days)
+                if match_weekday and past.weekday() != candidate.weekday():
+                    continue
+                if abs((moment - candidate).total_seconds()) <= PUBLISH_WINDOW_MINUTES * 60:
+                    return True
+        return False
+    
+    def next_delay(self, feed_key: str, now: Optional[datetime] = None) -> float:
+        """
+        Seconds until a feed should be polled again
+        
+        The backed-off interval is shortened so the poll does not overshoot
+        the start of the next usual publish window.
+        
+        Args:
+            feed_key: Feed identifier (the newsletter URL)
+            now: Current time, defaults to the current local time
+        
+        Returns:
+            Delay in seconds, with jitter applied
+        """
+        now = now or datetime.now()
+        with self._lock:
+            feed = self._feed(feed_key)
+            interval = feed["interval"]
+            
+            if self._near_publish_time(feed, now):
+                interval = MIN_POLL_SECONDS
+            else:
+                # Wake up at the beginning of an upcoming publish window
+                step = timedelta(seconds=MIN_POLL_SECONDS)
+                moment = now + step
+                while (moment - now).total_seconds() < interval:
+                    if self._near_publish_time(feed, moment):
+                        interval = max(MIN_POLL_SECONDS, (moment - now).total_seconds())
+                        break
+                    moment += step
+        
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from contextlib import contextmanager
+
+
+# Maximum number of concurrent calls allowed against each external provider.
+# Batch runs share these caps across every newsletter being processed.
+DEFAULT_PROVIDER_LIMITS = {
+    "substack": 8,
+    "openai": 4,
+    "replicate": 4,
+    "telegram": 2,
+}
+
+_limits = dict(DEFAULT_PROVIDER_LIMITS)
+_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+def configure_provider_limits(limits: dict) -> None:
+    """
+    Override the per-provider concurrency caps
+    
+    Must be called before any work is scheduled, since semaphores that were
+    already handed out keep their original size.
+    
+    Args:
+        limits: Mapping of provider name to maximum concurrent calls
+    """
+    with _lock:
+        for provider, limit in limits.items():
+            if int(limit) < 1:
+                raise ValueError(f"Concurrency limit for {provider} must be at least 1")
+            _limits[provider] = int(limit)
+            _semaphores.pop(provider, None)
+
+
+def get_provider_limit(provider: str) -> int:
+    """
+    Current concurrency cap of a provider
+    
+    Args:
+        provider: Provider name (e.g., 'openai', 'replicate')
+    
+    Returns:
+        Maximum number of concurrent calls
+    """
+    with _lock:
+        return _limits.get(provider, 1)
+
+
+def _get_semaphore(provider: str) -> threading.BoundedSemaphore:
+    with _lock:
+        semaphore = _semaphores.get(provider)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(_limits.get(provider, 1))
+            _semaphores[provider] = semaphore
+        return semaphore
+
+
+@contextmanager
+def provider_slot(provider: str):
+    """
+    Hold one of the concurrency slots of a provider for the duration of a block
+    
+    Args:
+        provider: Provider name (e.g., 'openai', 'replicate')
+    """
+    semaphore = _get_semaphore(provider)
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
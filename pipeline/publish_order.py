@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+
+class PublishOrder:
+    def __init__(self):
+        """
+        Delivery turns for episodes produced concurrently, so they reach the
+        channel in the order their posts were published
+        
+        Episodes are numbered by position (0 = oldest). An episode may be
+        delivered once every earlier position has finished, whether it was
+        delivered, skipped or failed.
+        """
+        self._condition = threading.Condition()
+        self._finished: set[int] = set()
+        self._next = 0
+    
+    def wait_turn(self, position: int) -> None:
+        """
+        Block until every episode before this position has finished
+        
+        Args:
+            position: Position of the episode in publish order
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._next >= position)
+    
+    def finish(self, position: int) -> None:
+        """
+        Mark an episode as finished, letting the next one(s) deliver
+        
+        Args:
+            position: Position of the episode in publish order
+        """
+        with self._condition:
+            self._finished.add(position)
+            while self._next in self._finished:
+                self._finished.discard(self._next)
+                self._next += 1
+            self._condition.notify_all()
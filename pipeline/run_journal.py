@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from pipeline.state_dir import get_state_dir
+
+
+# Pipeline stages in execution order; completing a stage invalidates the ones after it
+RUN_STAGES = ("fetch", "clean", "script", "audio", "encode", "deliver")
+
+# Stages shared by every audio variant of a run; the later stages are journaled
+# per variant under keys such as 'audio@es' (see variant_stage)
+SHARED_STAGES = ("fetch", "clean", "script")
+
+# Failed runs are resumed automatically until they used this many attempts
+MAX_RUN_ATTEMPTS = int(os.getenv('PODCAST_MAX_RUN_ATTEMPTS', '5'))
+
+# Completed run records kept for inspection (their artifacts are always deleted)
+MAX_COMPLETED_RUNS = 100
+
+
+def make_run_id(newsletter_url: str, post_id: str) -> str:
+    """
+    Stable run ID for one post of a newsletter, so retries of the same post share a journal
+    
+    Args:
+        newsletter_url: Newsletter URL
+        post_id: Identifier of the post (GUID or URL)
+    
+    Returns:
+        Run ID such as 'example-3f9a0c12d4'
+    """
+    name = urlparse(newsletter_url).netloc.split('.')[0] or 'run'
+    digest = hashlib.sha256(f"{newsletter_url}\n{post_id}".encode('utf-8')).hexdigest()[:10]
+    return f"{name}-{digest}"
+
+
+def variant_stage(stage: str, variant: Optional[str] = None) -> str:
+    """
+    Journal key of a stage for an audio variant
+    
+    Args:
+        stage: Stage name (see RUN_STAGES)
+        variant: Variant name, or None for the main episode
+    
+    Returns:
+        Stage key such as 'audio' or 'audio@es'
+    """
+    return f"{stage}@{variant}" if variant else stage
+
+
+def _split_stage(key: str) -> tuple[str, Optional[str]]:
+    stage, _, variant = key.partition('@')
+    return stage, variant or None
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class PipelineRun:
+    def __init__(self, record_path: Path, data: dict):
+        """
+        Journal of one pipeline run: its post, options, stage checkpoints and artifacts
+        
+        Use RunJournal to create or load runs.
+        
+        Args:
+            record_path: JSON file holding the run record
+            data: Run record
+        """
+        self.record_path = record_path
+        self.artifact_dir = record_path.with_suffix('')
+        self.data = data
+        # Audio variants checkpoint the same run from several threads
+        self._lock = threading.Lock()
+    
+    @property
+    def run_id(self) -> str:
+        return self.data["run_id"]
+    
+    @property
+    def status(self) -> str:
+        return self.data["status"]
+    
+    @property
+    def attempts(self) -> int:
+        return self.data["attempts"]
+    
+    @property
+    def post(self) -> dict:
+        return self.data["post"]
+    
+    def _save(self) -> None:
+        # Callers hold self._lock
+        self.data["updated_at"] = _now()
+        text = json.dumps(self.data, indent=2)
+        # Write to a temporary file first so a crash never leaves a truncated record;
+        # unique per save, so concurrent saves never move each other's file
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.record_path.parent,
+                                         prefix=self.record_path.stem + '.', suffix='.tmp', delete=False) as f:
+            f.write(text)
+        os.replace(f.name, self.record_path)
+    
+    def path(self, name: str) -> Path:
+        """
+        Location for an artifact of this run
+        
+        Args:
+            name: File name (e.g., 'script.txt')
+        
+        Returns:
+            Path inside the run's artifact directory
+        """
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+        return self.artifact_dir / name
+    
+    def stage(self, stage: str) -> dict:
+        """
+        Checkpoint of a stage
+        
+        Args:
+            stage: Stage name (see RUN_STAGES) or variant_stage key
+        
+        Returns:
+            Stage record (empty if the stage never ran)
+        """
+        return self.data["stages"].get(stage, {})
+    
+    def is_done(self, stage: str, params: Optional[dict] = None) -> bool:
+        """
+        Whether a stage completed with the same parameters and its artifact still exists
+        
+        Args:
+            stage: Stage name
+            params: Settings the stage output depends on
+        
+        Returns:
+            True if the stage can be skipped
+        """
+        record = self.stage(stage)
+        if record.get("status") != "done" or record.get("params") != params:
+            return False
+        artifact = self.artifact_path(stage)
+        return artifact is None or artifact.exists()
+    
+    def artifact_path(self, stage: str) -> Optional[Path]:
+        """
+        Artifact recorded by a stage
+        
+        Args:
+            stage: Stage name
+        
+        Returns:
+            Path of the artifact, or None if the stage recorded none
+        """
+        artifact = self.stage(stage).get("artifact")
+        return self.artifact_dir / artifact if artifact else None
+    
+    def record_stage(self, stage: str, done: bool = True, artifact: Optional[Path] = None,
+                     params: Optional[dict] = None, **details) -> None:
+        """
+        Checkpoint a stage and drop the checkpoints of every later stage
+        
+        Later stages of other variants are kept, unless the stage is shared
+        by all variants (SHARED_STAGES).
+        
+        Args:
+            stage: Stage key (a stage name, or a variant_stage key)
+            done: False to save progress of a stage that is not finished (e.g., partial delivery)
+            artifact: Output file of the stage, inside the artifact directory
+            params: Settings the stage output depends on
+            details: Additional JSON-serializable values to keep with the stage
+        """
+        name, variant = _split_stage(stage)
+        with self._lock:
+            self.data["stages"][stage] = {
+                "status": "done" if done else "partial",
+                "artifact": Path(artifact).name if artifact else None,
+                "params": params,
+                "finished_at": _now(),
+                **details,
+            }
+            for key in list(self.data["stages"]):
+                later, later_variant = _split_stage(key)
+                if (RUN_STAGES.index(later) > RUN_STAGES.index(name)
+                        and (name in SHARED_STAGES or later_variant == variant)):
+                    del self.data["stages"][key]
+            self._save()
+    
+    def next_stage(self) -> Optional[str]:
+        """
+        First stage of the main episode without a completed checkpoint
+        
+        Returns:
+            Stage name, or None if every stage completed
+        """
+        for stage in RUN_STAGES:
+            if self.stage(stage).get("status") != "done":
+                return stage
+        return None
+    
+    def begin_attempt(self) -> None:
+        """Mark the run as running again, counting the attempt"""
+        with self._lock:
+            self.data["attempts"] += 1
+            self.data["status"] = "running"
+            self.data["error"] = None
+            self._save()
+    
+    def fail(self, error: str) -> None:
+        """
+        Record a failed attempt; after MAX_RUN_ATTEMPTS the run is no longer resumed automatically
+        
+        Args:
+            error: Error message
+        """
+        with self._lock:
+            self.data["status"] = "abandoned" if self.attempts >= MAX_RUN_ATTEMPTS else "failed"
+            self.data["error"] = error
+            self._save()
+    
+    def finish(self) -> None:
+        """Mark the run as completed and delete its artifacts"""
+        with self._lock:
+            self.data["status"] = "completed"
+            self.data["error"] = None
+            self._save()
+        shutil.rmtree(self.artifact_dir, ignore_errors=True)
+
+
+class RunJournal:
+    def __init__(self, journal_dir: Optional[Path] = None):
+        """
+        Persistent journal of pipeline runs, one JSON record (and artifact directory) per run
+        
+        Args:
+            journal_dir: Optional directory, defaults to 'runs' in the state directory
+        """
+        self.journal_dir = Path(journal_dir) if journal_dir else get_state_dir() / 'runs'
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def _record_path(self, run_id: str) -> Path:
+        return self.journal_dir / f"{run_id}.json"
+    
+    def _read(self, record_path: Path) -> Optional[PipelineRun]:
+        try:
+            return PipelineRun(record_path, json.loads(record_path.read_text(encoding='utf-8')))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable run record {record_path}: {e}")
+            return None
+    
+    def list_runs(self) -> list[PipelineRun]:
+        """
+        All recorded runs, most recently updated first
+        
+        Returns:
+            List of runs
+        """
+        runs = [run for run in map(self._read, self.journal_dir.glob('*.json')) if run is not None]
+        return sorted(runs, key=lambda run: run.data["updated_at"], reverse=True)
+    
+    def load(self, run_id: str) -> PipelineRun:
+        """
+        Load a run by ID
+        
+        Args:
+            run_id: Run ID
+        
+        Returns:
+            The run
+        """
+        record_path = self._record_path(run_id)
+        run = self._read(record_path) if record_path.exists() else None
+        if run is None:
+            raise ValueError(f"Unknown run: {run_id}")
+        return run
+    
+    def find_resumable(self, newsletter_url: str) -> Optional[PipelineRun]:
+        """
+        Most recent interrupted run of a newsletter that should be resumed
+        
+        Args:
+            newsletter_url: Newsletter URL
+        
+        Returns:
+            The run, or None if there is nothing to resume
+        """
+        for run in self.list_runs():
+            if (run.data["newsletter_url"] == newsletter_url and run.status in ("running", "failed")
+                    and run.is_done("fetch")):
+                return run
+        return None
+    
+    def start(self, newsletter_url: str, post: dict, channels: list, options: dict,
+              fresh: bool = False) -> PipelineRun:
+        """
+        Open the run for a post, continuing its journal if an earlier run did not complete
+        
+        Args:
+            newsletter_url: Newsletter URL
+            post: Item dictionary returned by get_latest_post
+            channels: Target channel IDs
+            options: Pipeline options, reused when the run is resumed from the CLI
+            fresh: Discard any earlier journal of this post
+        
+        Returns:
+            The run; its status is 'abandoned' if the post already failed too often
+        """
+        run_id = make_run_id(newsletter_url, post.get("guid") or post["link"])
+        record_path = self._record_path(run_id)
+        
+        with self._lock:
+            run = self._read(record_path) if record_path.exists() else None
+            if run is not None and not fresh and run.status != "completed":
+                if run.status != "abandoned":
+                    run.begin_attempt()
+                return run
+            
+            if run is not None:
+                shutil.rmtree(run.artifact_dir, ignore_errors=True)
+            
+            run = PipelineRun(record_path, {
+                "run_id": run_id,
+                "newsletter_url": newsletter_url,
+                "post": {key: value for key, value in post.items() if key != "content"},
+                "channels": list(channels),
+                "options": options,
+                "status": "running",
+                "attempts": 1,
+                "error": None,
+                "created_at": _now(),
+                "updated_at": _now(),
+                "stages": {},
+            })
+            run._save()
+            self._prune()
+            return run
+    
+    def _prune(self) -> None:
+        completed = [run for run in self.list_runs() if run.status == "completed"]
+        for run in completed[MAX_COMPLETED_RUNS:]:
+            run.record_path.unlink(missing_ok=True)
+
+
+_shared_journal = None
+_shared_journal_lock = threading.Lock()
+
+
+def get_run_journal() -> RunJournal:
+    """
+    Process-wide journal instance
+    
+    Returns:
+        Shared RunJournal
+    """
+    global _shared_journal
+    with _shared_journal_lock:
+        if _shared_journal is None:
+            _shared_journal = RunJournal()
+        return _shared_journal
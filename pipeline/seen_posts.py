@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from pipeline.state_dir import get_state_dir
+
+
+# Number of processed post identifiers (URL and GUID) remembered per feed; enough
+# for a backfill of several hundred posts
+MAX_PROCESSED_PER_FEED = 2000
+
+
+class SeenPostStore:
+    def __init__(self, store_path: Optional[Path] = None):
+        """
+        Persistent record of processed posts and feed HTTP validators
+        
+        Layout of the JSON file:
+        
+            {"feeds": {"<feed url>": {"etag": ..., "last_modified": ..., "processed": [...]}}}
+        
+        Args:
+            store_path: Optional JSON file path, defaults to seen_posts.json in the state directory
+        """
+        self.store_path = Path(store_path) if store_path else get_state_dir() / 'seen_posts.json'
+        self._lock = threading.Lock()
+        self._data = {"feeds": {}}
+        
+        if self.store_path.exists():
+            try:
+                self._data = json.loads(self.store_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable seen-post store {self.store_path}: {e}")
+    
+    def _feed(self, feed_url: str) -> dict:
+        return self._data["feeds"].setdefault(feed_url, {"etag": None, "last_modified": None, "processed": []})
+    
+    def _save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a truncated store
+        tmp_path = self.store_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._data, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.store_path)
+    
+    def get_validators(self, feed_url: str) -> dict:
+        """
+        Conditional request headers for a feed, based on the last processed response
+        
+        Args:
+            feed_url: Feed URL (without cache-busting parameters)
+        
+        Returns:
+            Dictionary of If-None-Match / If-Modified-Since headers (may be empty)
+        """
+        with self._lock:
+            feed = self._data["feeds"].get(feed_url, {})
+            headers = {}
+            if feed.get("etag"):
+                headers['If-None-Match'] = feed["etag"]
+            if feed.get("last_modified"):
+                headers['If-Modified-Since'] = feed["last_modified"]
+            return headers
+    
+    def is_processed(self, feed_url: str, *post_ids: str) -> bool:
+        """
+        Check whether a post was already processed
+        
+        Args:
+            feed_url: Feed URL the post belongs to
+            post_ids: Any identifiers of the post (URL, GUID)
+        
+        Returns:
+            True if any of the identifiers was recorded as processed
+        """
+        with self._lock:
+            processed = self._data["feeds"].get(feed_url, {}).get("processed", [])
+            return any(post_id and post_id in processed for post_id in post_ids)
+    
+    def mark_processed(self, feed_url: str, post_ids: list[str],
+                       etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Record a post as processed, together with the feed validators it was fetched with
+        
+        Validators are only stored here, once the episode was delivered, so a
+        failed run never turns the next fetch into a 304.
+        
+        Args:
+            feed_url: Feed URL the post belongs to
+            post_ids: Identifiers of the post (URL, GUID)
+            etag: ETag of the feed response, if known
+            last_modified: Last-Modified of the feed response, if known
+        """
+        with self._lock:
+            feed = self._feed(feed_url)
+            for post_id in post_ids:
+                if post_id and post_id not in feed["processed"]:
+                    feed["processed"].append(post_id)
+            feed["processed"] = feed["processed"][-MAX_PROCESSED_PER_FEED:]
+            
+            if etag or last_modified:
+                feed["etag"] = etag
+                feed["last_modified"] = last_modified
+            
+            self._save()
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_seen_post_store() -> SeenPostStore:
+    """
+    Process-wide store instance, so concurrent pipeline runs never overwrite each other's updates
+    
+    Returns:
+        Shared SeenPostStore
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = SeenPostStore()
+        return _shared_store
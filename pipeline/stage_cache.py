@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from pipeline.state_dir import get_state_dir
+from pipeline.metrics import record
+
+
+# Default cache size limit, overridable with PODCAST_CACHE_MAX_MB
+DEFAULT_MAX_MB = 200
+
+
+class StageCache:
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        """
+        Disk-backed, content-addressed cache for pipeline stage outputs
+        
+        Entries are keyed on the stage name, the hash of the stage input and the
+        parameters that influence the output (model, prompt version, voice...).
+        The least recently used entries are evicted once the cache exceeds max_bytes.
+        
+        Args:
+            cache_dir: Optional cache directory, defaults to 'cache' in the state directory
+            max_bytes: Optional size limit, defaults to PODCAST_CACHE_MAX_MB megabytes
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else get_state_dir() / 'cache'
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('PODCAST_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(stage: str, stage_input: Union[str, bytes], params: dict) -> str:
+        """
+        Content address of a stage output
+        
+        Args:
+            stage: Stage name (e.g., 'clean', 'script', 'audio')
+            stage_input: Input text or bytes of the stage
+            params: Parameters that change the output; must be JSON serializable
+        
+        Returns:
+            Hex digest identifying the entry
+        """
+        if isinstance(stage_input, str):
+            stage_input = stage_input.encode('utf-8')
+        digest = hashlib.sha256()
+        digest.update(stage.encode('utf-8') + b'\0')
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8') + b'\0')
+        digest.update(hashlib.sha256(stage_input).digest())
+        return digest.hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+    
+    def _count(self, stage: str, hit: bool) -> None:
+        with self._lock:
+            counters = self.hits if hit else self.misses
+            counters[stage] = counters.get(stage, 0) + 1
+    
+    def lookup(self, stage: str, key: str) -> Optional[Path]:
+        """
+        Path of a cached entry, refreshing its LRU position
+        
+        Args:
+            stage: Stage name, used for the hit/miss counters
+            key: Entry key from make_key
+        
+        Returns:
+            Path to the stored output, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._count(stage, False)
+            record(cache_misses=1)
+            return None
+        self._count(stage, True)
+        record(cache_hits=1)
+        return path
+    
+    def store(self, key: str, source_path: Path) -> None:
+        """
+        Copy a file into the cache and evict old entries if needed
+        
+        Args:
+            key: Entry key from make_key
+            source_path: File holding the stage output
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Copy under a unique name and rename, so readers never see partial entries
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+    
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob('*/*'):
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+    
+    def cached_text(self, stage: str, stage_input: str, params: dict, compute: Callable[[], str]) -> str:
+        """
+        Return a cached text output, computing and storing it on a miss
+        
+        Args:
+            stage: Stage name
+            stage_input: Input text of the stage
+            params: Parameters that change the output
+            compute: Function producing the output on a miss
+        
+        Returns:
+            Stage output text
+        """
+        key = self.make_key(stage, stage_input, params)
+        path = self.lookup(stage, key)
+        if path is not None:
+            print(f"♻️  Cache hit for {stage} stage")
+            return path.read_text(encoding='utf-8')
+        
+        output = compute()
+        self.store_text(key, output)
+        return output
+    
+    def store_text(self, key: str, text: str) -> None:
+        """
+        Store a text output under a key
+        
+        Args:
+            key: Entry key from make_key
+            text: Stage output text
+        """
+        tmp_path = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            tmp_path.write_text(text, encoding='utf-8')
+            self.store(key, tmp_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    
+    def cached_file(self, stage: str, stage_input: str, params: dict,
+                    compute: Callable[[Path], Path], output_path: Path) -> Path:
+        """
+        Materialize a cached file output at output_path, computing it on a miss
+        
+        Args:
+            stage: Stage name
+            stage_input: Input text of the stage
+            params: Parameters that change the output
+            compute: Function writing the output to the given path and returning it
+            output_path: Where the output file should end up
+        
+        Returns:
+            Path to the output file
+        """
+        output_path = Path(output_path)
+        key = self.make_key(stage, stage_input, params)
+        path = self.lookup(stage, key)
+        if path is not None:
+            print(f"♻️  Cache hit for {stage} stage")
+            shutil.copyfile(path, output_path)
+            return output_path
+        
+        output_path = Path(compute(output_path))
+        self.store(key, output_path)
+        return output_path
+    
+    def summary(self) -> str:
+        """Human readable hit/miss counters per stage"""
+        with self._lock:
+            stages = sorted(set(self.hits) | set(self.misses))
+            return ", ".join(f"{stage} {self.hits.get(stage, 0)} hit/{self.misses.get(stage, 0)} miss" for stage in stages)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_stage_cache() -> StageCache:
+    """
+    Process-wide stage cache instance, shared by concurrent pipeline runs
+    
+    Returns:
+        Shared StageCache
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = StageCache()
+        return _shared_cache
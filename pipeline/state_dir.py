@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+import os
+from pathlib import Path
+
+
+def get_state_dir() -> Path:
+    """
+    Directory holding persistent pipeline state between runs
+    
+    Defaults to '.podcast_state' in the working directory and can be moved
+    with the PODCAST_STATE_DIR environment variable.
+    
+    Returns:
+        Path to the (created) state directory
+    """
+    state_dir = Path(os.getenv('PODCAST_STATE_DIR', '.podcast_state'))
+    state_dir.mkdir(parents=True, exist_ok=True)
+    return state_dir
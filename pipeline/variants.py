@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import re
+from typing import Optional
+
+from ai.transcript_tts import VOICE_SETTINGS
+
+
+# Variant names end up in journal stage keys, metrics labels and file names
+VARIANT_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def normalize_variants(variants: Optional[list]) -> list[dict]:
+    """
+    Validate audio variant definitions and bring them into one shape
+    
+    A variant turns the shared podcast script into another episode for its own
+    channel(s): a different voice or speed, or a different language through a
+    translation of the script. For example:
+    
+        {"name": "es", "channel_id": "-1001234567890", "language": "Spanish",
+         "voice_id": "Spanish_Narrator", "speed": 1.05}
+    
+    Voice settings are any of VOICE_SETTINGS; language_boost defaults to the
+    variant's language.
+    
+    Args:
+        variants: List of variant dictionaries from the configuration, or None
+    
+    Returns:
+        List of dictionaries with 'name', 'channels', 'language' (None when the
+        script is not translated) and 'voice' (TTS parameter overrides)
+    """
+    normalized = []
+    for variant in variants or []:
+        name = str(variant.get('name', ''))
+        if not VARIANT_NAME.match(name):
+            raise ValueError(f"Variant names may only contain letters, digits, '-' and '_': {variant}")
+        if any(existing['name'] == name for existing in normalized):
+            raise ValueError(f"Duplicate variant name: {name}")
+        if not variant.get('channel_id'):
+            raise ValueError(f"Variant {name} needs a 'channel_id'")
+        
+        unknown = set(variant) - {'name', 'channel_id', 'language', *VOICE_SETTINGS}
+        if unknown:
+            raise ValueError(f"Unknown setting(s) for variant {name}: {', '.join(sorted(unknown))}")
+        
+        channel_id = variant['channel_id']
+        language = variant.get('language')
+        voice = {key: variant[key] for key in VOICE_SETTINGS if key in variant}
+        if language and 'language_boost' not in voice:
+            voice['language_boost'] = language
+        
+        normalized.append({
+            "name": name,
+            "channels": [channel_id] if isinstance(channel_id, (str, int)) else list(channel_id),
+            "language": language,
+            "voice": voice,
+        })
+    return normalized
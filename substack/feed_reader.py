@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from typing import Iterable, Optional
+
+from lxml import etree
+
+
+# Bytes requested from the response per read while looking for items
+READ_CHUNK_SIZE = 16 * 1024
+
+CONTENT_ENCODED_TAG = '{http://purl.org/rss/1.0/modules/content/}encoded'
+
+
+def _child_text(item, tag: str) -> Optional[str]:
+    child = item.find(tag)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip()
+
+
+def _item_to_dict(item) -> dict:
+    return {
+        "link": _child_text(item, 'link'),
+        "guid": _child_text(item, 'guid'),
+        "title": _child_text(item, 'title'),
+        "published": _child_text(item, 'pubDate'),
+        "content": _child_text(item, CONTENT_ENCODED_TAG),
+    }
+
+
+def parse_feed_items(chunks: Iterable[bytes], limit: int = 1) -> list[dict]:
+    """
+    Incrementally parse RSS items, stopping as soon as enough were found
+    
+    The feed is fed to a pull parser chunk by chunk, so neither memory use nor
+    parse time depends on how long the rest of the feed is.
+    
+    Args:
+        chunks: Raw feed bytes in order (e.g., response.iter_content())
+        limit: Number of items to return (the newest ones, in feed order)
+    
+    Returns:
+        List of up to limit item dictionaries with 'link', 'guid', 'title',
+        'published' and 'content' (content:encoded, or None)
+    """
+    parser = etree.XMLPullParser(events=('end',), tag='item', recover=True)
+    items = []
+    
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, item in parser.read_events():
+            items.append(_item_to_dict(item))
+            item.clear()
+            if len(items) >= limit:
+                return items
+    
+    # Items completed only at the end of a (possibly truncated) document
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    for _, item in parser.read_events():
+        if len(items) >= limit:
+            break
+        items.append(_item_to_dict(item))
+    return items
+
+
+def read_feed_items(response, limit: int = 1) -> list[dict]:
+    """
+    Read the newest items from a streamed feed response and stop downloading
+    
+    Args:
+        response: requests response opened with stream=True
+        limit: Number of items to return
+    
+    Returns:
+        List of up to limit item dictionaries (see parse_feed_items)
+    """
+    try:
+        return parse_feed_items(response.iter_content(chunk_size=READ_CHUNK_SIZE), limit)
+    finally:
+        # Drop the rest of the body instead of downloading it
+        response.close()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from pipeline.state_dir import get_state_dir
+
+
+# Latency assumed for a source that has never been measured
+DEFAULT_LATENCY_SECONDS = 5.0
+
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.3
+
+
+class FeedSourceStats:
+    def __init__(self, stats_path: Optional[Path] = None):
+        """
+        Persistent latency and success-rate statistics for RSS feed sources
+        
+        Args:
+            stats_path: Optional JSON file path, defaults to feed_sources.json in the state directory
+        """
+        self.stats_path = Path(stats_path) if stats_path else get_state_dir() / 'feed_sources.json'
+        self._lock = threading.Lock()
+        self._stats = {}
+        
+        if self.stats_path.exists():
+            try:
+                self._stats = json.loads(self.stats_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable feed source stats {self.stats_path}: {e}")
+                self._stats = {}
+    
+    def _save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a truncated file
+        tmp_path = self.stats_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._stats, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.stats_path)
+    
+    def record(self, source: str, success: bool, latency: float) -> None:
+        """
+        Record the outcome of one fetch attempt and persist the statistics
+        
+        Args:
+            source: Source name
+            success: Whether the source returned a valid feed
+            latency: Wall time of the attempt in seconds
+        """
+        with self._lock:
+            entry = self._stats.setdefault(source, {"attempts": 0, "successes": 0, "latency": None})
+            entry["attempts"] += 1
+            if success:
+                entry["successes"] += 1
+                if entry["latency"] is None:
+                    entry["latency"] = latency
+                else:
+                    entry["latency"] = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * entry["latency"]
+            
+            try:
+                self._save()
+            except OSError as e:
+                print(f"⚠️  Could not save feed source stats: {e}")
+    
+    def success_rate(self, source: str) -> float:
+        """Smoothed success rate, 0.5 for sources without history"""
+        entry = self._stats.get(source, {})
+        return (entry.get("successes", 0) + 1) / (entry.get("attempts", 0) + 2)
+    
+    def expected_latency(self, source: str) -> float:
+        """Expected time to a valid response, penalizing unreliable sources"""
+        latency = self._stats.get(source, {}).get("latency") or DEFAULT_LATENCY_SECONDS
+        return latency / self.success_rate(source)
+    
+    def rank(self, sources: list[str]) -> list[str]:
+        """
+        Order sources from most to least promising
+        
+        Args:
+            sources: Source names in their default order
+        
+        Returns:
+            Source names sorted by expected latency (ties keep the default order)
+        """
+        with self._lock:
+            return sorted(sources, key=self.expected_latency)
+
+
+_shared_stats = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_feed_source_stats() -> FeedSourceStats:
+    """
+    Process-wide statistics instance, so concurrent newsletters update one ranking
+    
+    Returns:
+        Shared FeedSourceStats
+    """
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = FeedSourceStats()
+        return _shared_stats
@@ -1,20 +1,228 @@
 # -*- coding: utf-8 -*-
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from html.parser import HTMLParser
 import re
 
 
-def clean_newsletter_html(html_content: str) -> str:
+# Bump whenever the cleaning rules change so cached clean text is regenerated
+CLEANER_VERSION = "1"
+
+# Elements dropped with their content, and elements followed by a paragraph break
+REMOVED_TAGS = frozenset(['script', 'style', 'img', 'figure', 'span'])
+BLOCK_TAGS = frozenset(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'blockquote', 'hr'])
+
+# Precompiled patterns of the fast engine's text post-processing
+_HORIZONTAL_SPACE = re.compile(r'[ \t]+')
+_UI_TEXT = re.compile(r'more info.*|Subscribe')
+_EMAIL_PROMPT = re.compile(r'Type your email.*')
+
+
+@lru_cache(maxsize=1)
+def _tree_building_rules():
+    """
+    Tree-building rules of BeautifulSoup's html.parser builder, mirrored by the fast engine
+    
+    bs4 is imported on first use so that runs without a new post never load it.
+    
+    Returns:
+        Tuple of (builder, ASCII whitespace characters, entity name -> character mapping)
+    """
+    from bs4 import BeautifulSoup
+    from bs4.builder import HTMLParserTreeBuilder
+    from bs4.dammit import EntitySubstitution
+    
+    return HTMLParserTreeBuilder(), BeautifulSoup.ASCII_SPACES, EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+
+
+class _StreamingTextExtractor(HTMLParser):
+    """
+    Single-pass equivalent of the BeautifulSoup steps of clean_newsletter_html
+    
+    Uses the same tokenizer as BeautifulSoup's 'html.parser' builder and
+    replays its tree-building rules (implicit closing through end tags, void
+    elements, whitespace-only strings, string container types) on a stack of
+    open tag names instead of building a tree. Text is emitted as soon as it
+    is known to survive the cleaning steps.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._builder, self._ascii_spaces, self._entities = _tree_building_rules()
+        self.pieces = []
+        self._stack = []
+        self._open_counts = {}
+        self._removed_depth = 0
+        self._link_depth = 0
+        self._container_depth = 0
+        self._preserve_depth = 0
+        self._data = []
+        self._already_closed_empty = []
+    
+    def _end_data(self, included: bool = True) -> None:
+        """Flush the pending string, like BeautifulSoup.endData"""
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if not included or self._removed_depth:
+            return
+        if not self._preserve_depth and not data.strip(self._ascii_spaces):
+            data = "\n" if "\n" in data else " "
+        self.pieces.append(data)
+    
+    def _end_string(self) -> None:
+        # Strings inside string containers (template, rt, ...) are skipped by get_text()
+        self._end_data(included=not self._container_depth)
+    
+    def _push(self, tag: str) -> None:
+        self._stack.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if tag in REMOVED_TAGS:
+            self._removed_depth += 1
+        if tag == 'a':
+            self._link_depth += 1
+        if tag in self._builder.string_containers:
+            self._container_depth += 1
+        if tag in self._builder.preserve_whitespace_tags:
+            self._preserve_depth += 1
+    
+    def _pop(self) -> None:
+        tag = self._stack.pop()
+        self._open_counts[tag] -= 1
+        if tag in REMOVED_TAGS:
+            self._removed_depth -= 1
+        if tag == 'a':
+            self._link_depth -= 1
+        if tag in self._builder.string_containers:
+            self._container_depth -= 1
+        if tag in self._builder.preserve_whitespace_tags:
+            self._preserve_depth -= 1
+        # Block elements get a paragraph break unless they were removed or were part of a link
+        if tag in BLOCK_TAGS and not self._removed_depth and not self._link_depth:
+            self.pieces.append('\n\n')
+    
+    def _pop_to_tag(self, tag: str) -> None:
+        """Close the most recent open element with this name and everything opened after it"""
+        if not self._open_counts.get(tag):
+            return
+        while self._stack:
+            if self._stack[-1] == tag:
+                self._pop()
+                return
+            self._pop()
+    
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+    
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._end_string()
+        self._push(tag)
+        if handle_empty_element and tag in self._builder.empty_element_tags:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed_empty.append(tag)
+    
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed_empty:
+            self._already_closed_empty.remove(tag)
+        else:
+            self._end_string()
+            self._pop_to_tag(tag)
+    
+    def handle_data(self, data):
+        self._data.append(data)
+    
+    def handle_charref(self, name):
+        if name.startswith('x'):
+            codepoint = int(name.lstrip('x'), 16)
+        elif name.startswith('X'):
+            codepoint = int(name.lstrip('X'), 16)
+        else:
+            codepoint = int(name)
+        
+        data = None
+        if codepoint < 256:
+            try:
+                data = bytearray([codepoint]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(codepoint)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+    
+    def handle_entityref(self, name):
+        character = self._entities.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+    
+    def _skip_markup(self, data) -> None:
+        # Comments, declarations and processing instructions never reach get_text()
+        self._end_string()
+        self._data.append(data)
+        self._end_data(included=False)
+    
+    def handle_comment(self, data):
+        self._skip_markup(data)
+    
+    def handle_decl(self, decl):
+        self._skip_markup(decl)
+    
+    def handle_pi(self, data):
+        self._skip_markup(data)
+    
+    def unknown_decl(self, data):
+        if data.upper().startswith('CDATA['):
+            # CDATA sections are kept as text, whatever element they are in
+            self._end_string()
+            self._data.append(data[len('CDATA['):])
+            self._end_data()
+        else:
+            self._skip_markup(data)
+    
+    def close(self):
+        super().close()
+        self._end_string()
+        while self._stack:
+            self._pop()
+
+
+def _clean_newsletter_html_fast(html_content: str) -> str:
+    """Single-pass cleaner producing the same output as the BeautifulSoup engine"""
+    extractor = _StreamingTextExtractor()
+    extractor.feed(html_content)
+    extractor.close()
+    
+    # Newline and edge-space normalization of the reference engine is subsumed
+    # by the per-line strip below, so only the passes that change content remain
+    text = _HORIZONTAL_SPACE.sub(' ', "".join(extractor.pieces))
+    text = _UI_TEXT.sub('', text)
+    text = _EMAIL_PROMPT.sub('', text)
+    
+    return '\n\n'.join(line for line in (raw.strip() for raw in text.split('\n')) if len(line) > 2)
+
+
+def clean_newsletter_html(html_content: str, engine: str = "bs4") -> str:
     """
     Clean up the newsletter HTML content and extract only the text content
     
     Args:
         html_content: Raw HTML content to clean
+        engine: 'bs4' builds a BeautifulSoup tree (reference implementation);
+                'fast' extracts the same text in a single streaming pass
     
     Returns:
         Cleaned text content
     """
     
+    if engine == "fast":
+        return _clean_newsletter_html_fast(html_content)
+    if engine != "bs4":
+        raise ValueError(f"Unknown cleaner engine: {engine}")
+    
     # Parse HTML with BeautifulSoup
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html_content, 'html.parser')
     
     # Remove unwanted elements but keep structure
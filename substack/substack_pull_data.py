@@ -1,87 +1,447 @@
+import os
+import sys
 import requests
 import json
 import time
-from bs4 import BeautifulSoup
-from urllib.parse import quote
+import queue
+import threading
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlparse
+from typing import Optional
 
+from substack.feed_source_stats import FeedSourceStats, get_feed_source_stats
+from substack.feed_reader import read_feed_items
+from pipeline.seen_posts import SeenPostStore
+from pipeline.http_clients import get_session, CONNECT_TIMEOUT
 
-def get_latest_newsletter_html(newsletter_url: str) -> tuple[str, str]:
+
+# Delay before the next-ranked feed source is launched while earlier ones are still running
+HEDGE_DELAY_SECONDS = 2.0
+
+POST_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; Newsletter Bot)'}
+FEED_HEADERS = {'User-Agent': 'Newsletter-to-Podcast Bot'}
+
+# Feed sources raced for every newsletter, in default preference order, and the
+# rss2json endpoint; both can be overridden, e.g. to run against local stand-ins
+FEED_SOURCES = os.getenv('PODCAST_FEED_SOURCES', 'rss2json,direct,cors-anywhere,rss-proxy').split(',')
+RSS2JSON_API_URL = os.getenv('RSS2JSON_API_URL', 'https://api.rss2json.com/v1/api.json')
+
+# Posts requested per page of the Substack archive API when listing older posts
+ARCHIVE_PAGE_SIZE = 50
+
+
+def get_feed_url(newsletter_url: str) -> str:
     """
-    Get HTML content and URL of the latest newsletter post using RSS proxy services
+    Canonical RSS feed URL of a Substack newsletter
     
     Args:
-        newsletter_url: URL of the Substack newsletter (e.g., "https://example.substack.com")
+        newsletter_url: URL of the Substack newsletter
     
     Returns:
-        Tuple of (HTML content, specific post URL)
+        Feed URL without cache-busting parameters
     """
-    print(f"Fetching latest newsletter from: {newsletter_url}")
+    parsed = urlparse(newsletter_url)
+    if parsed.scheme and parsed.netloc and not parsed.netloc.endswith('.substack.com'):
+        # Custom domain: the feed is served under the publication URL
+        return f"{newsletter_url.rstrip('/')}/feed"
     
     # Get the subdomain from URL
     subdomain = newsletter_url.replace('https://', '').replace('.substack.com', '')
-    rss_url = f"https://{subdomain}.substack.com/feed"
+    return f"https://{subdomain}.substack.com/feed"
+
+
+def _build_feed_sources(newsletter_url: str) -> dict[str, str]:
+    """
+    Build the feed URLs to race, keyed by source name
+    
+    Args:
+        newsletter_url: URL of the Substack newsletter
+    
+    Returns:
+        Dictionary of source name -> feed URL, in default preference order
+    """
+    rss_url = get_feed_url(newsletter_url)
     
     # Use RSS proxy services that work reliably in GitHub Actions
-    # Add cache-busting parameters to force fresh RSS data
+    # Add cache-busting parameters to force fresh RSS data through the proxies;
+    # the direct feed relies on conditional requests instead
     cache_buster = int(time.time())
     rss_url_with_cache_buster = f"{rss_url}?t={cache_buster}&refresh=1"
     encoded_url = quote(rss_url_with_cache_buster, safe='')
-    proxy_services = [
-        f"https://api.rss2json.com/v1/api.json?rss_url={encoded_url}",
-        f"https://cors-anywhere.herokuapp.com/{rss_url_with_cache_buster}",
-        f"https://rss-proxy.herokuapp.com/v1?url={encoded_url}"
-    ]
+    sources = {
+        "rss2json": f"{RSS2JSON_API_URL}?rss_url={encoded_url}",
+        "direct": rss_url,
+        "cors-anywhere": f"https://cors-anywhere.herokuapp.com/{rss_url_with_cache_buster}",
+        "rss-proxy": f"https://rss-proxy.herokuapp.com/v1?url={encoded_url}",
+    }
+    sources = {name: url for name, url in sources.items() if name in FEED_SOURCES}
+    if not sources:
+        raise ValueError(f"No known feed source in PODCAST_FEED_SOURCES: {', '.join(FEED_SOURCES)}")
+    return sources
+
+
+class FetchCancelled(Exception):
+    """Raised by a feed request whose race was already won by another source"""
+
+
+def _fetch_latest_item(source: str, feed_url: str, validators: Optional[dict] = None,
+                       session: Optional[requests.Session] = None,
+                       cancel: Optional[threading.Event] = None) -> Optional[dict]:
+    """
+    Fetch a feed from one source and extract its latest item
+    
+    Args:
+        source: Source name
+        feed_url: Feed URL for that source
+        validators: Conditional request headers, only sent to the direct feed
+        session: HTTP session to use, defaults to the shared Substack session
+        cancel: Optional event; once set, the body is not read and FetchCancelled is raised
+    
+    Returns:
+        Item dictionary with 'link', 'guid', 'published' (ISO 8601, or None),
+        'content' (None when the full post must be fetched), 'etag' and
+        'last_modified', or None when the direct feed answered 304 Not Modified
+    """
+    headers = dict(FEED_HEADERS)
+    if source == "direct" and validators:
+        headers.update(validators)
+    
+    # Streamed, so XML feeds can stop downloading once the latest item was parsed
+    session = session or get_session("substack")
+    response = session.get(feed_url, headers=headers, timeout=(CONNECT_TIMEOUT, 30), stream=True)
+    if cancel is not None and cancel.is_set():
+        # Another source won while this one waited for headers: free the connection right away
+        response.close()
+        raise FetchCancelled(source)
+    if response.status_code == 304:
+        response.close()
+        return None
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
     
-    for proxy_url in proxy_services:
+    item = {"etag": None, "last_modified": None}
+    if source == "direct":
+        item["etag"] = response.headers.get('ETag')
+        item["last_modified"] = response.headers.get('Last-Modified')
+    
+    if source == "rss2json":
+        # Handle rss2json format
+        data = response.json()
+        if data.get('status') != 'ok' or not data.get('items'):
+            raise ValueError("rss2json returned no items")
+        
+        latest_item = data['items'][0]
+        content = latest_item.get('content', latest_item.get('description', ''))
+        item["link"] = latest_item['link']
+        item["guid"] = latest_item.get('guid')
+        published = _parse_published(latest_item.get('pubDate'))
+        item["published"] = published.isoformat() if published else None
+        # If content is too short, the full post is fetched instead
+        item["content"] = content if len(content) >= 1000 else None
+        return item
+    
+    # Handle direct feed and proxy XML responses
+    items = read_feed_items(response, limit=1)
+    if not items or not items[0]["link"]:
+        raise ValueError("Feed contains no items")
+    
+    item["link"] = items[0]["link"]
+    item["guid"] = items[0]["guid"]
+    published = _parse_published(items[0]["published"])
+    item["published"] = published.isoformat() if published else None
+    item["content"] = None
+    return item
+
+
+def _race_feed_sources(sources: dict[str, str], stats: FeedSourceStats,
+                       validators: Optional[dict] = None,
+                       session: Optional[requests.Session] = None,
+                       direct_result: Optional[queue.Queue] = None) -> tuple[str, Optional[dict]]:
+    """
+    Race the feed sources and return the first valid latest item
+    
+    The direct feed and the best-ranked other source start immediately; the
+    direct feed is the only one that answers conditional requests (304) and
+    tells the feed's validators. Every HEDGE_DELAY_SECONDS without a valid
+    response (or right after a failure) the next source joins.
+    
+    Once a source wins, the others are cancelled: a losing request that is
+    still waiting for its response headers closes the response as soon as
+    they arrive, without reading the body. The direct feed is never
+    cancelled, since it stops reading after the latest item anyway. Requests
+    that already failed or finished report their latency to the statistics.
+    
+    Args:
+        sources: Dictionary of source name -> feed URL
+        stats: Statistics used for ranking and updated with every outcome
+        validators: Conditional request headers for the direct feed
+        session: HTTP session shared by all sources
+        direct_result: Optional queue receiving the direct feed's latest item
+                       (None for 304, or the exception) whenever it finishes
+    
+    Returns:
+        Tuple of (winning source name, latest item or None if not modified)
+    """
+    results = queue.Queue()
+    cancel = threading.Event()
+    
+    def worker(source: str) -> None:
+        started = time.monotonic()
         try:
-            print(f"Trying RSS proxy service...")
-            headers = {'User-Agent': 'Newsletter-to-Podcast Bot'}
-            response = requests.get(proxy_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            if 'rss2json' in proxy_url:
-                # Handle rss2json format
-                data = response.json()
-                if data.get('status') == 'ok' and data.get('items'):
-                    latest_item = data['items'][0]
-                    post_url = latest_item['link']
-                    
-                    # Get content from RSS description or fetch full post
-                    content = latest_item.get('content', latest_item.get('description', ''))
-                    if len(content) < 1000:  # If content is too short, fetch full post
-                        print("RSS content too short, fetching full post...")
-                        post_response = requests.get(post_url, headers={'User-Agent': 'Mozilla/5.0 (compatible; Newsletter Bot)'}, timeout=30)
-                        post_response.raise_for_status()
-                        content = post_response.text
-                    
-                    print(f"✅ Successfully fetched newsletter!")
-                    print(f"📄 Post URL: {post_url}")
-                    print(f"📝 Content length: {len(content)} characters")
-                    return content, post_url
-            else:
-                # Handle direct proxy response
-                soup = BeautifulSoup(response.text, 'xml')
-                items = soup.find_all('item')
-                
-                if items:
-                    latest_item = items[0]
-                    post_url = latest_item.find('link').text.strip()
-                    
-                    # Get full post content
-                    print("Fetching full post content...")
-                    post_response = requests.get(post_url, headers={'User-Agent': 'Mozilla/5.0 (compatible; Newsletter Bot)'}, timeout=30)
-                    post_response.raise_for_status()
-                    
-                    print(f"✅ Successfully fetched newsletter!")
-                    print(f"📄 Post URL: {post_url}")
-                    print(f"📝 Content length: {len(post_response.text)} characters")
-                    return post_response.text, post_url
-                    
+            item = _fetch_latest_item(source, sources[source], validators, session,
+                                      None if source == "direct" else cancel)
+        except FetchCancelled:
+            return
         except Exception as e:
-            print(f"Proxy service failed: {str(e)}")
+            stats.record(source, False, time.monotonic() - started)
+            if source == "direct" and direct_result is not None:
+                direct_result.put(e)
+            results.put((source, None, e))
+            return
+        stats.record(source, True, time.monotonic() - started)
+        if source == "direct" and direct_result is not None:
+            direct_result.put(item)
+        results.put((source, item, None))
+    
+    def start(source: str) -> None:
+        print(f"Trying RSS source {source}...")
+        threading.Thread(target=worker, args=(source,), daemon=True).start()
+    
+    waiting = stats.rank(list(sources))
+    running = 0
+    if "direct" in waiting:
+        waiting.remove("direct")
+        start("direct")
+        running += 1
+    
+    while waiting or running:
+        if waiting:
+            start(waiting.pop(0))
+            running += 1
+        
+        try:
+            source, item, error = results.get(timeout=HEDGE_DELAY_SECONDS if waiting else None)
+        except queue.Empty:
             continue
+        
+        running -= 1
+        if error is None:
+            cancel.set()
+            return source, item
+        print(f"RSS source {source} failed: {str(error)}")
+    
+    raise Exception("All RSS sources failed")
+
+
+def _learn_validators(seen_posts: SeenPostStore, feed_url: str, direct_result: queue.Queue) -> None:
+    """
+    Store the direct feed's ETag / Last-Modified once its latest item is known to be processed
+    
+    Waits for the direct feed when another source won the race, so the next
+    run can send a conditional request. Validators are never stored for a
+    feed whose latest item was not processed, or that post would be missed.
+    
+    Args:
+        seen_posts: Store of processed posts
+        feed_url: Feed URL
+        direct_result: Queue receiving the direct feed's outcome (see _race_feed_sources)
+    """
+    try:
+        direct = direct_result.get(timeout=30)
+    except queue.Empty:
+        return
+    if not isinstance(direct, dict) or not (direct["etag"] or direct["last_modified"]):
+        return
+    if seen_posts.is_processed(feed_url, direct["link"], direct["guid"]):
+        seen_posts.mark_processed(feed_url, [], direct["etag"], direct["last_modified"])
+
+
+def get_latest_post(newsletter_url: str, seen_posts: Optional[SeenPostStore] = None,
+                    session: Optional[requests.Session] = None) -> Optional[dict]:
+    """
+    Find the latest post of a newsletter, skipping it if it was already processed
+    
+    Args:
+        newsletter_url: URL of the Substack newsletter
+        seen_posts: Optional store of processed posts; enables conditional requests
+                    and the already-processed check
+        session: HTTP session to use, defaults to the shared Substack session
+    
+    Returns:
+        Latest item dictionary (see _fetch_latest_item) plus 'feed_url',
+        or None when there is nothing new to process
+    """
+    print(f"Fetching latest newsletter from: {newsletter_url}")
+    
+    feed_url = get_feed_url(newsletter_url)
+    sources = _build_feed_sources(newsletter_url)
+    validators = seen_posts.get_validators(feed_url) if seen_posts else None
+    stats = get_feed_source_stats()
+    direct_result = queue.Queue()
+    
+    try:
+        source, item = _race_feed_sources(sources, stats, validators, session, direct_result)
+    except Exception:
+        raise Exception(f"All methods failed to fetch newsletter from {newsletter_url}")
+    
+    if item is None:
+        print(f"RSS source {source}: feed not modified since last processed post")
+        return None
+    
+    print(f"RSS source {source} answered first")
+    item["feed_url"] = feed_url
+    
+    if seen_posts and seen_posts.is_processed(feed_url, item["link"], item["guid"]):
+        print(f"Latest post already processed: {item['link']}")
+        if "direct" in sources:
+            _learn_validators(seen_posts, feed_url, direct_result)
+        return None
+    
+    return item
+
+
+def _parse_published(value: Optional[str]) -> Optional[datetime]:
+    # RSS pubDate is RFC 2822, rss2json's pubDate and the archive API's post_date are ISO 8601 (UTC)
+    if not value:
+        return None
+    try:
+        published = parsedate_to_datetime(value) if value[:1].isalpha() else datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return published if published.tzinfo else published.replace(tzinfo=timezone.utc)
+
+
+def _archive_page(archive_url: str, offset: int, session: requests.Session) -> list[dict]:
+    response = session.get(archive_url, params={"sort": "new", "offset": offset, "limit": ARCHIVE_PAGE_SIZE},
+                           headers=FEED_HEADERS, timeout=(CONNECT_TIMEOUT, 30))
+    response.raise_for_status()
+    return response.json()
+
+
+def list_posts(newsletter_url: str, limit: Optional[int] = None, since: Optional[date] = None,
+               until: Optional[date] = None, session: Optional[requests.Session] = None) -> list[dict]:
+    """
+    List past posts of a newsletter, oldest first, for a backfill
+    
+    The direct feed only carries the most recent posts; when more are needed
+    (for the limit or to reach back to since), the Substack archive API is
+    paged through as well. Publications without the archive API are limited
+    to what their feed lists.
+    
+    Args:
+        newsletter_url: URL of the Substack newsletter
+        limit: Optional number of posts, the most recent ones in the date range
+        since: Optional first publish date (inclusive)
+        until: Optional last publish date (inclusive)
+        session: HTTP session to use, defaults to the shared Substack session
+    
+    Returns:
+        List of item dictionaries like get_latest_post's, plus 'title' and
+        'published' (ISO 8601), in publish order
+    """
+    feed_url = get_feed_url(newsletter_url)
+    session = session or get_session("substack")
+    
+    response = session.get(feed_url, headers=FEED_HEADERS, timeout=(CONNECT_TIMEOUT, 30), stream=True)
+    response.raise_for_status()
+    posts = {}
+    for item in read_feed_items(response, limit=sys.maxsize):
+        if item["link"]:
+            posts[item["link"]] = (item["guid"], item["title"], _parse_published(item["published"]))
+    
+    def enough() -> bool:
+        dates = [published for _, _, published in posts.values() if published]
+        in_range = [published for published in dates
+                    if (since is None or published.date() >= since) and (until is None or published.date() <= until)]
+        if limit is not None and len(in_range) >= limit:
+            return True
+        # Posts are listed newest first, so the range is complete once an older post shows up
+        return since is not None and bool(dates) and min(dates).date() < since
+    
+    # Feed URL without '/feed': the publication's own domain
+    archive_url = f"{feed_url.rsplit('/', 1)[0]}/api/v1/archive"
+    offset = 0
+    while not enough():
+        try:
+            page = _archive_page(archive_url, offset, session)
+        except Exception as e:
+            print(f"⚠️  Archive API unavailable ({str(e)}), listing only the {len(posts)} posts in the feed")
+            break
+        for post in page:
+            if post.get("canonical_url") and post["canonical_url"] not in posts:
+                posts[post["canonical_url"]] = (None, post.get("title"), _parse_published(post.get("post_date")))
+        if len(page) < ARCHIVE_PAGE_SIZE:
+            break
+        offset += len(page)
+    
+    selected = sorted(((published, link, guid, title) for link, (guid, title, published) in posts.items()
+                       if published and (since is None or published.date() >= since)
+                       and (until is None or published.date() <= until)), reverse=True)
+    if limit is not None:
+        selected = selected[:limit]
     
-    raise Exception(f"All methods failed to fetch newsletter from {newsletter_url}")
+    # Feed validators are left out: they belong to the latest-post check of regular runs
+    return [{"link": link, "guid": guid, "title": title, "published": published.isoformat(), "content": None,
+             "feed_url": feed_url, "etag": None, "last_modified": None}
+            for published, link, guid, title in reversed(selected)]
+
+
+def fetch_post_html(post_url: str, session: Optional[requests.Session] = None) -> str:
+    """
+    Download the full HTML page of a post
+    
+    Args:
+        post_url: URL of the newsletter post
+        session: HTTP session to use, defaults to the shared Substack session
+    
+    Returns:
+        HTML content
+    """
+    # Get full post content
+    print("Fetching full post content...")
+    session = session or get_session("substack")
+    post_response = session.get(post_url, headers=POST_HEADERS, timeout=(CONNECT_TIMEOUT, 30))
+    post_response.raise_for_status()
+    return post_response.text
+
+
+def get_post_html(item: dict, session: Optional[requests.Session] = None) -> str:
+    """
+    HTML content of a feed item, fetching the full post when the feed had none
+    
+    Args:
+        item: Item dictionary returned by get_latest_post
+        session: HTTP session to use, defaults to the shared Substack session
+    
+    Returns:
+        HTML content
+    """
+    content = item["content"] if item.get("content") is not None else fetch_post_html(item["link"], session)
+    
+    print(f"✅ Successfully fetched newsletter!")
+    print(f"📄 Post URL: {item['link']}")
+    print(f"📝 Content length: {len(content)} characters")
+    return content
+
+
+def get_latest_newsletter_html(newsletter_url: str) -> tuple[str, str]:
+    """
+    Get HTML content and URL of the latest newsletter post using RSS proxy services
+    
+    The direct feed and every proxy are raced with hedging, fastest-ranked first.
+    
+    Args:
+        newsletter_url: URL of the Substack newsletter (e.g., "https://example.substack.com")
+    
+    Returns:
+        Tuple of (HTML content, specific post URL)
+    """
+    item = get_latest_post(newsletter_url)
+    return get_post_html(item), item["link"]
 
 
 if __name__ == "__main__":
@@ -93,4 +453,4 @@ if __name__ == "__main__":
         f.write(html_content)
     
     print(f"Latest post URL: {post_url}")
-    print(f"Saved latest newsletter HTML to latest_newsletter.html ({len(html_content)} characters)")
\ No newline at end of file
+    print(f"Saved latest newsletter HTML to latest_newsletter.html ({len(html_content)} characters)")
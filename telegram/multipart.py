@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import os
+import uuid
+from typing import BinaryIO, Iterator
+
+
+# Size of the blocks read from uploaded files
+BLOCK_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    def __init__(self, fields: dict, file_field: str, file_obj: BinaryIO,
+                 filename: str, content_type: str = "application/octet-stream"):
+        """
+        multipart/form-data request body that streams the file instead of loading it
+        
+        Passed as `data` to requests, it is sent with a Content-Length header and
+        read in BLOCK_SIZE pieces, so memory use does not depend on the file size.
+        
+        Args:
+            fields: Plain form fields
+            file_field: Form field name of the file
+            file_obj: Binary file object positioned at the start of the content
+            filename: File name reported to the server
+            content_type: MIME type of the file
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file_obj = file_obj
+        
+        head = b""
+        for name, value in fields.items():
+            if value is None:
+                continue
+            head += (f"--{self.boundary}\r\n"
+                     f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                     f"{value}\r\n").encode('utf-8')
+        head += (f"--{self.boundary}\r\n"
+                 f"Content-Disposition: form-data; name=\"{file_field}\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: {content_type}\r\n\r\n").encode('utf-8')
+        self.head = head
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+        
+        start = file_obj.tell()
+        file_obj.seek(0, os.SEEK_END)
+        self.file_size = file_obj.tell() - start
+        file_obj.seek(start)
+        
+        self._blocks = self._iter_blocks()
+        self._buffer = b""
+    
+    def __len__(self) -> int:
+        return len(self.head) + self.file_size + len(self.tail)
+    
+    def _iter_blocks(self) -> Iterator[bytes]:
+        yield self.head
+        while True:
+            block = self.file_obj.read(BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+        yield self.tail
+    
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+    
+    def __next__(self) -> bytes:
+        block = self.read(BLOCK_SIZE)
+        if not block:
+            raise StopIteration
+        return block
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the encoded body (everything left if size < 0)"""
+        while size < 0 or len(self._buffer) < size:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._buffer += block
+        
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
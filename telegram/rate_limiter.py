@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from typing import Optional
+
+
+# Bot API limits: about 30 messages per second overall and 20 per minute
+# into the same group or channel
+GLOBAL_MESSAGES_PER_SECOND = 30
+CHAT_MESSAGES_PER_MINUTE = 20
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Token bucket that hands out reservations instead of blocking under its lock
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if none is available
+        
+        Returns:
+            Seconds the caller must wait before using the token
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+    
+    def block(self, seconds: float) -> None:
+        """
+        Hand out no usable token for the given time (e.g., after a 429 response)
+        
+        Args:
+            seconds: Time to wait, from now
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class TelegramRateLimiter:
+    def __init__(self, global_rate: float = GLOBAL_MESSAGES_PER_SECOND,
+                 chat_per_minute: float = CHAT_MESSAGES_PER_MINUTE):
+        """
+        Global and per-chat token buckets for Bot API send methods
+        
+        Args:
+            global_rate: Messages per second across all chats
+            chat_per_minute: Messages per minute into a single chat
+        """
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_rate = chat_per_minute / 60
+        self._chats: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._chats.get(str(chat_id))
+            if bucket is None:
+                bucket = TokenBucket(self._chat_rate, 1)
+                self._chats[str(chat_id)] = bucket
+            return bucket
+    
+    def acquire(self, chat_id: str) -> None:
+        """
+        Block until a message may be sent to the chat
+        
+        Args:
+            chat_id: Target chat or channel
+        """
+        delay = max(self._global.reserve(), self._chat_bucket(chat_id).reserve())
+        if delay > 0:
+            time.sleep(delay)
+    
+    def retry_after(self, chat_id: str, seconds: float) -> None:
+        """
+        Pause a chat after Telegram answered 429 Too Many Requests
+        
+        Args:
+            chat_id: Chat the request was sent to
+            seconds: retry_after value from the response
+        """
+        self._chat_bucket(chat_id).block(seconds)
+
+
+_shared_limiter: Optional[TelegramRateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TelegramRateLimiter:
+    """
+    Process-wide limiter, so concurrent pipeline runs share the bot's rate limits
+    
+    Returns:
+        Shared TelegramRateLimiter
+    """
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = TelegramRateLimiter()
+        return _shared_limiter
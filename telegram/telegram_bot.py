@@ -4,22 +4,68 @@
 import os
 import requests
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Optional, Union
+
+from telegram.multipart import MultipartStream
+from telegram.rate_limiter import TelegramRateLimiter, get_rate_limiter
+from pipeline.http_clients import get_session
+from pipeline.metrics import record
+
+
+# Attempts per message when Telegram answers 429 Too Many Requests
+RATE_LIMIT_RETRIES = 3
+
+# Bot API server, overridable for a self-hosted Bot API server or local stand-ins
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
 
 
 class TelegramBot:
-    def __init__(self, bot_token: Optional[str] = None):
+    def __init__(self, bot_token: Optional[str] = None, session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[TelegramRateLimiter] = None):
         """
         Initialize Telegram bot with token from environment or parameter
         
         Args:
             bot_token: Optional bot token, if not provided will use TELEGRAM_API_BOT env var
+            session: Optional HTTP session, defaults to the shared pooled Telegram session
+            rate_limiter: Optional rate limiter, defaults to the process-wide limiter
         """
         self.bot_token = bot_token or os.getenv('TELEGRAM_API_BOT')
         if not self.bot_token:
             raise ValueError("Bot token not found. Set TELEGRAM_API_BOT environment variable or pass bot_token parameter")
         
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.base_url = f"{TELEGRAM_API_URL.rstrip('/')}/bot{self.bot_token}"
+        self.session = session or get_session("telegram")
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+    
+    def _rate_limited(self, chat_id: str, send: Callable[[], dict]) -> dict:
+        """
+        Send a message through the rate limiter, retrying after 429 responses
+        
+        Args:
+            chat_id: Target chat, used for the per-chat limit
+            send: Function performing the request and returning the API response
+        
+        Returns:
+            API response as dictionary
+        """
+        for attempt in range(1, RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire(chat_id)
+            result = send()
+            
+            retry_after = result.get('parameters', {}).get('retry_after') if result.get('error_code') == 429 else None
+            if retry_after is None or attempt == RATE_LIMIT_RETRIES:
+                return result
+            
+            print(f"⏳ Telegram rate limit for {chat_id}, retrying in {retry_after}s")
+            record(retries=1)
+            self.rate_limiter.retry_after(chat_id, retry_after)
+    
+    def _post_form(self, method: str, data: dict) -> dict:
+        """Call a Bot API method with form fields, skipping fields set to None"""
+        fields = {key: value for key, value in data.items() if value is not None}
+        response = self.session.post(f"{self.base_url}/{method}", data=fields)
+        return response.json()
     
     def send_message(self, chat_id: str, text: str, parse_mode: str = "HTML") -> dict:
         """
@@ -33,56 +79,142 @@ class TelegramBot:
         Returns:
             API response as dictionary
         """
-        url = f"{self.base_url}/sendMessage"
         data = {
             "chat_id": chat_id,
             "text": text,
             "parse_mode": parse_mode
         }
         
-        response = requests.post(url, data=data)
+        return self._rate_limited(chat_id, lambda: self._post_form('sendMessage', data))
+    
+    def _post_file(self, method: str, data: dict, file_field: str, file_obj: BinaryIO, filename: str) -> dict:
+        """
+        Call a Bot API upload method, streaming the file in the request body
+        
+        Args:
+            method: Bot API method name (e.g., 'sendAudio')
+            data: Form fields
+            file_field: Form field name of the file
+            file_obj: Binary file object to upload
+            filename: File name reported to Telegram
+        
+        Returns:
+            API response as dictionary
+        """
+        body = MultipartStream(data, file_field, file_obj, filename)
+        record(bytes_out=len(body))
+        response = self.session.post(f"{self.base_url}/{method}", data=body,
+                                     headers={'Content-Type': body.content_type})
         return response.json()
     
-    def send_audio(self, chat_id: str, audio_path: str, caption: str = "", title: str = "Podcast Episode") -> dict:
+    def _send_file(self, method: str, file_field: str, file: Union[str, Path, BinaryIO], data: dict,
+                   file_id: Optional[str] = None) -> dict:
+        """
+        Upload a file given as a path or an open binary file object, or resend one by file_id
+        
+        Args:
+            method: Bot API method name
+            file_field: Form field name of the file
+            file: Path to the file, or an open binary file object (ignored with file_id)
+            data: Form fields
+            file_id: Telegram file_id of an earlier upload to send instead of the file
+        
+        Returns:
+            API response as dictionary
+        """
+        chat_id = data['chat_id']
+        
+        if file_id:
+            return self._rate_limited(chat_id, lambda: self._post_form(method, {**data, file_field: file_id}))
+        
+        if hasattr(file, 'read'):
+            name = getattr(file, 'name', None)
+            filename = Path(name).name if isinstance(name, str) else 'podcast_audio.wav'
+            start = file.tell() if file.seekable() else None
+            
+            def upload() -> dict:
+                # Rewind so a retry after a 429 sends the whole file again
+                if start is not None:
+                    file.seek(start)
+                return self._post_file(method, data, file_field, file, filename)
+            
+            return self._rate_limited(chat_id, upload)
+        
+        file_path = Path(file)
+        if not file_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {file}")
+        
+        def upload_path() -> dict:
+            with open(file_path, 'rb') as f:
+                return self._post_file(method, data, file_field, f, file_path.name)
+        
+        return self._rate_limited(chat_id, upload_path)
+    
+    def send_audio(self, chat_id: str, audio_path: Union[str, Path, BinaryIO], caption: str = "", title: str = "Podcast Episode",
+                   duration: Optional[int] = None, file_id: Optional[str] = None) -> dict:
         """
         Send an audio file to a channel or chat
         
+        The file is streamed to Telegram, so it is never loaded into memory as a whole.
+        
         Args:
             chat_id: Channel ID or username
-            audio_path: Path to the audio file
+            audio_path: Path to the audio file, or an open binary file object
             caption: Optional caption for the audio
             title: Title for the audio file
+            duration: Optional duration in seconds
+            file_id: Optional file_id of an earlier upload, sent instead of uploading audio_path
         
         Returns:
             API response as dictionary
         """
-        url = f"{self.base_url}/sendAudio"
+        data = {
+            'chat_id': chat_id,
+            'caption': caption,
+            'title': title,
+            'duration': duration,
+            'parse_mode': 'HTML'
+        }
         
-        audio_file = Path(audio_path)
-        if not audio_file.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        return self._send_file('sendAudio', 'audio', audio_path, data, file_id)
+    
+    def send_voice(self, chat_id: str, voice_path: Union[str, Path, BinaryIO], caption: str = "",
+                   duration: Optional[int] = None, file_id: Optional[str] = None) -> dict:
+        """
+        Send an OGG/Opus file as a voice message to a channel or chat
         
-        with open(audio_file, 'rb') as audio:
-            files = {'audio': audio}
-            data = {
-                'chat_id': chat_id,
-                'caption': caption,
-                'title': title,
-                'parse_mode': 'HTML'
-            }
-            
-            response = requests.post(url, files=files, data=data)
-            return response.json()
+        Args:
+            chat_id: Channel ID or username
+            voice_path: Path to the OGG/Opus file, or an open binary file object
+            caption: Optional caption for the voice message
+            duration: Optional duration in seconds
+            file_id: Optional file_id of an earlier upload, sent instead of uploading voice_path
+        
+        Returns:
+            API response as dictionary
+        """
+        data = {
+            'chat_id': chat_id,
+            'caption': caption,
+            'duration': duration,
+            'parse_mode': 'HTML'
+        }
+        
+        return self._send_file('sendVoice', 'voice', voice_path, data, file_id)
     
-    def send_podcast_episode(self, chat_id: str, audio_path: str, episode_title: str = "Daily Newsletter Podcast", newsletter_url: str = None) -> dict:
+    def send_podcast_episode(self, chat_id: str, audio_path: Union[str, Path, BinaryIO], episode_title: str = "Daily Newsletter Podcast", newsletter_url: str = None,
+                             duration: Optional[int] = None, as_voice: bool = False, file_id: Optional[str] = None) -> dict:
         """
         Send a complete podcast episode with formatted message
         
         Args:
             chat_id: Channel ID or username
-            audio_path: Path to the podcast audio file
+            audio_path: Path to the podcast audio file, or an open binary file object
             episode_title: Title for the episode
             newsletter_url: URL to the specific newsletter post
+            duration: Optional episode duration in seconds
+            as_voice: Send as a voice message (the audio must be OGG/Opus)
+            file_id: Optional file_id of an earlier upload of the same episode, sent instead of audio_path
         
         Returns:
             API response as dictionary
@@ -98,7 +230,48 @@ class TelegramBot:
         if newsletter_url:
             caption += f"\n\n📖 <b>Read the full newsletter:</b>\n{newsletter_url}"
         
-        return self.send_audio(chat_id, audio_path, caption, episode_title)
+        if as_voice:
+            return self.send_voice(chat_id, audio_path, caption, duration, file_id)
+        return self.send_audio(chat_id, audio_path, caption, episode_title, duration, file_id)
+    
+    def broadcast_podcast_episode(self, chat_ids: list[str], audio_path: Union[str, Path], episode_title: str = "Daily Newsletter Podcast",
+                                  newsletter_url: str = None, duration: Optional[int] = None, as_voice: bool = False,
+                                  file_id: Optional[str] = None) -> dict:
+        """
+        Send a podcast episode to several channels, uploading the audio only once
+        
+        The first successful upload's file_id is reused for the remaining
+        channels. If an upload fails (e.g., the bot cannot post in that
+        channel), the next channel uploads the file instead.
+        
+        Args:
+            chat_ids: Channel IDs or usernames
+            audio_path: Path to the podcast audio file
+            episode_title: Title for the episode
+            newsletter_url: URL to the specific newsletter post
+            duration: Optional episode duration in seconds
+            as_voice: Send as a voice message (the audio must be OGG/Opus)
+            file_id: Optional file_id of an earlier upload of the same episode
+        
+        Returns:
+            Dictionary of chat ID -> API response; failures are reported per
+            channel as {'ok': False, 'description': ...}
+        """
+        file_field = 'voice' if as_voice else 'audio'
+        responses = {}
+        
+        for chat_id in chat_ids:
+            try:
+                response = self.send_podcast_episode(chat_id, audio_path, episode_title, newsletter_url,
+                                                     duration, as_voice, file_id)
+            except Exception as e:
+                response = {"ok": False, "description": str(e)}
+            responses[chat_id] = response
+            
+            if file_id is None and response.get('ok'):
+                file_id = response['result'].get(file_field, {}).get('file_id')
+        
+        return responses
     
     def get_chat_info(self, chat_id: str) -> dict:
         """
@@ -110,10 +283,6 @@ class TelegramBot:
         Returns:
             API response with chat information
         """
-        url = f"{self.base_url}/getChat"
-        data = {"chat_id": chat_id}
-        
-        response = requests.post(url, data=data)
-        return response.json()
+        return self._post_form('getChat', {"chat_id": chat_id})
 
 
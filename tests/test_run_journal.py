@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Run journal checkpoints written concurrently by audio variants
+
+Run with: python -m pytest tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from pipeline.run_journal import RunJournal, variant_stage
+
+VARIANTS = [f"v{index}" for index in range(8)]
+
+
+def start_run(tmp_path: Path):
+    journal = RunJournal(tmp_path / 'runs')
+    post = {"link": "https://example.substack.com/p/issue", "guid": None, "feed_url": "https://example.substack.com/feed"}
+    run = journal.start("https://example.substack.com", post, ["@main"], {})
+    for stage in ("fetch", "clean", "script"):
+        run.record_stage(stage)
+    return journal, run
+
+
+def test_variants_checkpoint_one_run_concurrently(tmp_path):
+    journal, run = start_run(tmp_path)
+    barrier = threading.Barrier(len(VARIANTS))
+    errors = []
+    
+    def produce(variant: str) -> None:
+        try:
+            barrier.wait()
+            for _ in range(20):
+                for stage in ("audio", "encode", "deliver"):
+                    run.record_stage(variant_stage(stage, variant), params={"variant": variant})
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=produce, args=(variant,)) for variant in VARIANTS]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    expected = {"fetch", "clean", "script"} | {variant_stage(stage, variant)
+                                               for variant in VARIANTS for stage in ("audio", "encode", "deliver")}
+    assert set(run.data["stages"]) == expected
+    
+    # The record on disk is complete and no temporary file is left behind
+    assert set(journal.load(run.run_id).data["stages"]) == expected
+    assert list(journal.journal_dir.glob('*.tmp')) == []
+
+
+def test_shared_stage_clears_every_variant(tmp_path):
+    _, run = start_run(tmp_path)
+    run.record_stage(variant_stage("audio", "es"))
+    run.record_stage("audio")
+    
+    run.record_stage("script")
+    assert set(run.data["stages"]) == {"fetch", "clean", "script"}
+
+
+def test_pipeline_with_variants_against_fake_services(tmp_path):
+    from benchmarks.fake_services import FakeServices
+    from benchmarks.substack_fixtures import load_fixture_corpus
+    
+    corpus = load_fixture_corpus()
+    services = FakeServices({"n1": next(iter(corpus.values()))}).start()
+    try:
+        variants = [{"name": f"v{index}", "channel_id": f"@variant{index}", "speed": 1 + index / 10}
+                    for index in range(6)]
+        spec = json.dumps({"newsletter_urls": [services.newsletter_url("n1")],
+                           "options": {"audio_format": "wav", "variants": variants}})
+        env = {**os.environ, **services.env(), "PODCAST_STATE_DIR": str(tmp_path)}
+        process = subprocess.run([sys.executable, str(ROOT / 'benchmarks' / 'bench_pipeline.py'), "--scenario", spec],
+                                 capture_output=True, text=True, cwd=ROOT, env=env, timeout=300)
+    finally:
+        services.stop()
+    
+    assert process.returncode == 0, process.stderr[-2000:]
+    result = json.loads(process.stdout.splitlines()[-1].split(" ", 1)[1])
+    assert [run["ok"] for run in result["runs"]] == [True], result
+    
+    records = [json.loads(path.read_text(encoding='utf-8')) for path in (tmp_path / 'runs').glob('*.json')]
+    assert [record["status"] for record in records] == ["completed"]